@@ -0,0 +1,249 @@
+"""
+Compact on-disk store for raw search responses, task outputs and final
+itineraries.
+
+Layout of an ARTIFACT_DIR:
+- artifacts.bin: append-only records, each a small header (flags, creation
+  time, lengths) followed by the key, the kind and the compressed payload.
+  Payloads are msgpack + zstd when those packages are installed, JSON + zlib
+  otherwise; the flags byte says which, so files written with either setup
+  stay readable.
+- index.sqlite: key -> (kind, offset, length, created) index. Lookups go
+  through SQLite and read the record from a memory-mapped view of
+  artifacts.bin, so nothing is loaded into RAM up front no matter how many
+  artifacts are stored.
+
+iter_artifacts() streams records straight from artifacts.bin, and
+rebuild_index() recreates the index from it, creation times included.
+"""
+import os
+import json
+import mmap
+import time
+import zlib
+import struct
+import sqlite3
+import hashlib
+import threading
+import logging
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only safe from a single process
+    fcntl = None
+
+# flags, creation time (Unix seconds), key length, kind length, payload length
+RECORD_HEADER = struct.Struct(">BdHHI")
+
+FLAG_MSGPACK = 0x01
+FLAG_ZSTD = 0x02
+
+
+def artifact_key(*parts):
+    """Stable hash key for the given parts (e.g. kind, normalized query, num)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _encode(value):
+    flags = 0
+    if msgpack is not None:
+        raw = msgpack.packb(value, use_bin_type=True)
+        flags |= FLAG_MSGPACK
+    else:
+        raw = json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+    if zstandard is not None:
+        flags |= FLAG_ZSTD
+        return flags, zstandard.ZstdCompressor(level=10).compress(raw)
+    return flags, zlib.compress(raw, 6)
+
+
+def _decode(flags, payload):
+    if flags & FLAG_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Artifact was written with zstd; install zstandard to read it")
+        raw = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        raw = zlib.decompress(payload)
+
+    if flags & FLAG_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Artifact was written with msgpack; install msgpack to read it")
+        return msgpack.unpackb(raw, raw=False)
+    return json.loads(raw)
+
+
+class ArtifactStore:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.data_path = os.path.join(directory, "artifacts.bin")
+        self._lock = threading.Lock()
+        self._map = None
+
+        # Touch the data file so it can be opened for reading and mapping
+        open(self.data_path, "ab").close()
+        self._data = open(self.data_path, "rb")
+
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"),
+                                   check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS artifacts (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                created REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def put(self, key, kind, value):
+        """Appends the value under key (replacing an older version in the index)."""
+        flags, payload = _encode(value)
+        created = time.time()
+        key_bytes, kind_bytes = key.encode("utf-8"), kind.encode("utf-8")
+        record = (RECORD_HEADER.pack(flags, created, len(key_bytes), len(kind_bytes),
+                                     len(payload))
+                  + key_bytes + kind_bytes + payload)
+
+        with self._lock:
+            with open(self.data_path, "ab") as f:
+                # Several batch worker processes may share one store
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    f.seek(0, os.SEEK_END)
+                    offset = f.tell()
+                    f.write(record)
+                    f.flush()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+            self._db.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                (key, kind, offset, len(record), created))
+            self._db.commit()
+
+    def _view(self, end):
+        # Remap when the file grew past the current mapping
+        if self._map is None or len(self._map) < end:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._data.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def get(self, key, max_age=None):
+        """
+        Returns the stored value, or None if the key is unknown or older than
+        max_age seconds.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT offset, length, created FROM artifacts WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+            offset, length, created = row
+            if max_age is not None and time.time() - created > max_age:
+                return None
+            record = self._view(offset + length)[offset:offset + length]
+
+        flags, _, key_length, kind_length, _ = RECORD_HEADER.unpack_from(record)
+        return _decode(flags, record[RECORD_HEADER.size + key_length + kind_length:])
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM artifacts WHERE key = ?",
+                                    (key,)).fetchone() is not None
+
+    def _scan(self):
+        """
+        Yields (offset, length, flags, created, key, kind, payload) for every
+        record in file order.
+        """
+        with open(self.data_path, "rb") as f:
+            while True:
+                offset = f.tell()
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                flags, created, key_length, kind_length, payload_length = \
+                    RECORD_HEADER.unpack(header)
+                key = f.read(key_length).decode("utf-8")
+                kind = f.read(kind_length).decode("utf-8")
+                payload = f.read(payload_length)
+                if len(payload) < payload_length:
+                    logging.warning(f"Truncated artifact record at offset {offset}")
+                    return
+                yield (offset, f.tell() - offset, flags, created, key, kind, payload)
+
+    def iter_artifacts(self, kind=None):
+        """
+        Streams (key, kind, value) for every stored record, oldest first,
+        optionally only of one kind. Older versions of replaced keys are
+        included; the file is read sequentially, never loaded whole.
+        """
+        for _, _, flags, _, key, record_kind, payload in self._scan():
+            if kind is None or record_kind == kind:
+                yield key, record_kind, _decode(flags, payload)
+
+    def rebuild_index(self):
+        """
+        Recreates index.sqlite from artifacts.bin (latest record per key wins),
+        keeping each record's stored creation time so max_age still applies.
+        """
+        with self._lock:
+            self._db.execute("DELETE FROM artifacts")
+            for offset, length, _, created, key, kind, _ in self._scan():
+                self._db.execute(
+                    "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                    (key, kind, offset, length, created))
+            self._db.commit()
+
+    def stats(self):
+        """Number of indexed artifacts per kind and the data file size in bytes."""
+        with self._lock:
+            kinds = dict(self._db.execute(
+                "SELECT kind, COUNT(*) FROM artifacts GROUP BY kind").fetchall())
+        return {"artifacts": kinds, "bytes": os.path.getsize(self.data_path)}
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            self._data.close()
+            self._db.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """
+    Process-wide store in ARTIFACT_DIR, or None when ARTIFACT_DIR isn't set
+    (artifacts are then simply not persisted).
+    """
+    global _store
+    directory = os.getenv("ARTIFACT_DIR")
+    if not directory:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore(directory)
+        return _store
@@ -0,0 +1,150 @@
+"""
+Batch itinerary generation across a process pool.
+
+Each worker process imports travel_planner_multi_agent once, so it builds
+its own agents, tasks, crew and LLM a single time and reuses them for every
+job it runs. Nothing is shared between workers; each one gets an equal
+share of the provider rate limits so the pool as a whole stays within the
+quotas. Results are appended to the output file as soon as each job
+finishes, and a per-worker throughput summary is printed at the end.
+
+Input: a CSV file with a header row
+(destination,start_date,end_date,preferences) or a JSONL file with the same
+keys. Output: JSONL, one line per job.
+
+With --resume, jobs reuse the task checkpoints of an earlier run of the
+same request (see checkpoints.py), so re-running a batch after failures only
+pays for the tasks that didn't complete.
+
+Usage:
+    python batch_planner.py jobs.csv results.jsonl --workers 4 [--resume]
+"""
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+JOB_FIELDS = ("destination", "start_date", "end_date", "preferences")
+
+# Set once per worker process by init_worker
+_planner = None
+
+
+def read_jobs(path):
+    """Reads job rows from a CSV (with header) or JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+
+    jobs = []
+    for row in rows:
+        job = {field: (row.get(field) or "").strip() for field in JOB_FIELDS}
+        if not job["preferences"]:
+            job.pop("preferences")
+        jobs.append(job)
+    return jobs
+
+
+def init_worker(processes=1):
+    """
+    Process pool initializer: importing the planner builds this worker's
+    crew once. `processes` is the number of processes calling the providers
+    (the pool size), which split the rate limits between them.
+    """
+    global _planner
+    logging.basicConfig(level=logging.WARNING)
+    import resilience
+    resilience.share_rate_limits(processes)
+    import travel_planner_multi_agent
+    _planner = travel_planner_multi_agent
+
+
+def run_job(index, job, resume=False):
+    """Runs one job in a worker process and returns its JSON-serializable record."""
+    started = time.monotonic()
+    record = {"index": index, "job": job, "worker": os.getpid()}
+    try:
+        result = _planner.create_travel_itinerary(**job, resume=resume)
+        record["success"] = True
+        record["output"] = result.raw
+    except Exception as e:
+        record["success"] = False
+        record["error"] = str(e)
+    record["seconds"] = round(time.monotonic() - started, 2)
+    return record
+
+
+def run_batch(jobs, output_path, workers=None, resume=False):
+    """
+    Runs every job across `workers` processes (default: CPU count), streaming
+    each result to output_path as JSONL as soon as it completes. With
+    resume=True, completed task checkpoints of earlier runs are reused.
+    Returns the per-worker summary.
+    """
+    workers = workers or os.cpu_count()
+    started = time.monotonic()
+    per_worker = {}
+
+    # spawn gives every worker a clean interpreter, with no crew state or
+    # background threads inherited from the parent
+    context = multiprocessing.get_context("spawn")
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                initializer=init_worker,
+                                initargs=(workers,)) as pool:
+        futures = [pool.submit(run_job, index, job, resume)
+                   for index, job in enumerate(jobs)]
+        for future in as_completed(futures):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+            stats = per_worker.setdefault(record["worker"],
+                                          {"jobs": 0, "failed": 0, "busy_seconds": 0.0})
+            stats["jobs"] += 1
+            stats["failed"] += 0 if record["success"] else 1
+            stats["busy_seconds"] += record["seconds"]
+
+            status = "✅" if record["success"] else "❌"
+            print(f"{status} [{record['worker']}] {record['job']['destination']} "
+                  f"({record['seconds']}s)")
+
+    elapsed = time.monotonic() - started
+    print("\n" + "="*60)
+    print(f"📦 {len(jobs)} jobs in {elapsed:.1f}s with {workers} workers "
+          f"({len(jobs) / elapsed * 60:.1f} jobs/min)")
+    for pid, stats in sorted(per_worker.items()):
+        rate = stats["jobs"] / stats["busy_seconds"] * 60 if stats["busy_seconds"] else 0.0
+        print(f"   worker {pid}: {stats['jobs']} jobs, {stats['failed']} failed, "
+              f"{rate:.1f} jobs/min busy")
+    print("="*60)
+    return per_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate itineraries in batch")
+    parser.add_argument("jobs", help="CSV or JSONL file of "
+                        "destination,start_date,end_date,preferences rows")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--resume", action="store_true",
+                        help="reuse completed task checkpoints of earlier runs")
+    args = parser.parse_args()
+
+    jobs = read_jobs(args.jobs)
+    if not jobs:
+        print("No jobs found")
+        sys.exit(1)
+    run_batch(jobs, args.output, args.workers, args.resume)
+
+
+if __name__ == "__main__":
+    main()
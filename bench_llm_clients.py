@@ -0,0 +1,125 @@
+"""
+Benchmark of per-call client overhead: a new OpenAI client per call (what
+generate_itinerary used to do) against the shared client from llm_clients.
+
+Calls go to a local stub server that answers chat completions instantly,
+so the numbers are pure client-side overhead: client construction plus
+connection setup. Against api.openai.com a new client also pays a TLS
+handshake per call, so real savings are larger than shown here.
+
+Usage:
+    python bench_llm_clients.py --calls 200 --threads 8
+"""
+import os
+import json
+import time
+import argparse
+import threading
+import statistics
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+COMPLETION = json.dumps({
+    "id": "chatcmpl-bench",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-5-nano",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # connections stall on Nagle + delayed ACK and hide the difference
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(COMPLETION)))
+        self.end_headers()
+        self.wfile.write(COMPLETION)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def chat(client):
+    return client.chat.completions.create(
+        model="gpt-5-nano", messages=[{"role": "user", "content": "ping"}])
+
+
+def new_client_call():
+    from openai import OpenAI
+    client = OpenAI(max_retries=0)
+    try:
+        return chat(client)
+    finally:
+        client.close()
+
+
+def shared_client_call():
+    import llm_clients
+    return chat(llm_clients.get_openai_client())
+
+
+def measure(call, calls, threads):
+    """Runs `calls` calls on `threads` threads; returns per-call latencies in ms."""
+    def timed(_):
+        started = time.perf_counter()
+        call()
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(timed, range(calls)))
+
+
+def report(label, latencies, elapsed):
+    ordered = sorted(latencies)
+    print(f"{label:<16} mean {statistics.mean(ordered):7.2f} ms   "
+          f"p50 {ordered[len(ordered) // 2]:7.2f} ms   "
+          f"p95 {ordered[int(0.95 * (len(ordered) - 1))]:7.2f} ms   "
+          f"{len(ordered) / elapsed:8.1f} calls/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM client overhead")
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1)
+    args = parser.parse_args()
+
+    server = start_stub_server()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "bench")
+    # The shared pool applies the "openai" rate limit; lift it so only
+    # client overhead is measured
+    os.environ["OPENAI_RATE_PER_MIN"] = "100000000"
+    os.environ["OPENAI_BURST"] = "100000"
+
+    # Warm up imports and the shared pool so only per-call work is timed
+    new_client_call()
+    shared_client_call()
+
+    print(f"🏁 {args.calls} calls on {args.threads} thread(s) against a local stub\n")
+    for label, call in (("new client", new_client_call),
+                        ("shared client", shared_client_call)):
+        started = time.perf_counter()
+        latencies = measure(call, args.calls, args.threads)
+        report(label, latencies, time.perf_counter() - started)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
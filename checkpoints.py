@@ -0,0 +1,65 @@
+"""
+Checkpoints for multi-task crew runs.
+
+Each run gets a directory under RUNS_DIR named after a hash of its request
+parameters. Every task output is written there as soon as the task
+finishes, so a resumed run can skip the tasks that already completed
+instead of paying for them again.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+
+RUNS_DIR = os.getenv("RUNS_DIR", "runs")
+
+
+def request_hash(**params):
+    """Stable short hash of the request parameters, used as the run id."""
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def run_dir(run_id):
+    path = os.path.join(RUNS_DIR, run_id)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _write_json(path, data):
+    # Write to a temp file first so a crash never leaves a half-written checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def save_request(run_id, params):
+    _write_json(os.path.join(run_dir(run_id), "request.json"), params)
+
+
+def load_request(run_id):
+    path = os.path.join(RUNS_DIR, run_id, "request.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_task_output(run_id, task_name, raw_output):
+    _write_json(os.path.join(run_dir(run_id), f"{task_name}.json"), {
+        "task": task_name,
+        "raw": raw_output,
+        "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    logging.info(f"💾 Checkpointed task '{task_name}' for run {run_id}")
+
+
+def load_task_output(run_id, task_name):
+    """Returns the saved raw output of the task, or None if it never completed."""
+    path = os.path.join(RUNS_DIR, run_id, f"{task_name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["raw"]
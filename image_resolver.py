@@ -0,0 +1,94 @@
+"""
+Resolves real image URLs for itinerary days without involving the LLM.
+
+Every attraction of the itinerary is looked up concurrently through the
+shared search client's image search, and the attraction -> image mapping is
+cached so repeated attractions (and re-plans) cost nothing.
+"""
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import search_client
+
+# Images attached to each day (its first attractions that have a result)
+IMAGES_PER_DAY = int(os.getenv("IMAGES_PER_DAY", "3"))
+IMAGE_SEARCH_WORKERS = int(os.getenv("IMAGE_SEARCH_WORKERS", "8"))
+
+# normalized "attraction, location" -> image dict, or None when nothing was found
+_image_cache = {}
+_image_cache_lock = threading.Lock()
+
+
+def _image_query(attraction, location):
+    return f"{attraction}, {location}"
+
+
+def find_image(attraction, location):
+    """
+    Returns {"url": ..., "description": ...} for the attraction's best image
+    result, or None when the search fails or has no usable image.
+    """
+    query = _image_query(attraction, location)
+    key = search_client.normalize_query(query)
+    with _image_cache_lock:
+        if key in _image_cache:
+            return _image_cache[key]
+
+    image = None
+    try:
+        image_data = search_client.image_search(query)
+        for result in image_data.get("images", []):
+            if result.get("imageUrl", "").startswith("https://"):
+                image = {
+                    "url": result["imageUrl"],
+                    "description": result.get("title") or query
+                }
+                break
+    except Exception as e:
+        # Don't cache failures, a later run may succeed
+        logging.warning(f"Image search failed for '{query}': {e}")
+        return None
+
+    with _image_cache_lock:
+        _image_cache[key] = image
+    return image
+
+
+def resolve_itinerary_images(itinerary, destination):
+    """
+    Fills `images_day` of every day in the itinerary dict in place, searching
+    all attractions of all days concurrently. Days that already have images
+    are left alone. Returns the itinerary.
+    """
+    days = [day for day in itinerary.get("itinerary", {}).get("days", [])
+            if not day.get("images_day")]
+
+    # Attractions are qualified with the destination (day locations are often
+    # just a neighbourhood), so the same attraction on two days is one lookup
+    images_by_name = {}
+    for day in days:
+        for activity in day.get("activities", []):
+            if activity.get("name"):
+                images_by_name[activity["name"]] = None
+
+    logging.info(f"📸 Resolving images for {len(images_by_name)} attractions")
+    if images_by_name:
+        with ThreadPoolExecutor(max_workers=IMAGE_SEARCH_WORKERS) as pool:
+            futures = {name: pool.submit(find_image, name, destination)
+                       for name in images_by_name}
+            for name, future in futures.items():
+                images_by_name[name] = future.result()
+
+    for day in days:
+        images = []
+        for activity in day.get("activities", []):
+            image = images_by_name.get(activity.get("name"))
+            if image and image not in images:
+                images.append(image)
+            if len(images) == IMAGES_PER_DAY:
+                break
+        day["images_day"] = images
+
+    return itinerary
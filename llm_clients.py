@@ -0,0 +1,170 @@
+"""
+Process-wide LLM client registry.
+
+Every entry point shares one pooled httpx client (keep-alive connections,
+shared timeouts, optional HTTP/2), and the OpenAI / LangChain clients built
+on top of it are created once and reused across agents, tools and threads.
+Repeated LLM calls then skip client construction and connection/TLS
+handshakes.
+
+- planner_agent.py uses get_openai_client()
+- planner_agent_crewai.py's generate_itinerary tool uses get_langchain_llm()
+- CrewAI agents' LLMs go through share_with_crewai(), which swaps the
+  shared client into native CrewAI OpenAI LLMs (litellm-backed ones get a
+  pool of their own through litellm's session)
+
+Every request on the OpenAI pool goes through resilience's "openai" policy
+(rate limit, retry with backoff, circuit breaker) in ResilientTransport, so
+the policy covers all of those callers in one place. The SDK clients are
+built with max_retries=0 to avoid retrying twice. litellm's session is
+process-wide and serves whichever provider a call targets, so its pool has
+no policy and litellm keeps its own retries.
+
+See bench_llm_clients.py for the per-call overhead this saves.
+"""
+import os
+import threading
+import logging
+
+import httpx
+
+import resilience
+
+TIMEOUT = httpx.Timeout(float(os.getenv("LLM_TIMEOUT", "120")),
+                        connect=float(os.getenv("LLM_CONNECT_TIMEOUT", "10")))
+LIMITS = httpx.Limits(
+    max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "50")),
+    max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+)
+HTTP2 = os.getenv("LLM_HTTP2", "false").lower() == "true"
+
+# Re-entrant: the SDK client factories fetch the shared http client
+_lock = threading.RLock()
+_clients = {}
+
+
+def _api_key():
+    return os.getenv("OPEN_AI_KEY") or os.getenv("OPENAI_API_KEY")
+
+
+def _get_or_create(name, factory):
+    with _lock:
+        if name not in _clients:
+            _clients[name] = factory()
+        return _clients[name]
+
+
+class RetryableResponse(Exception):
+    """A 408/429/5xx response, raised so resilience.call retries the request."""
+
+    def __init__(self, response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+        self.status_code = response.status_code
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    Sends each request under the "openai" resilience policy. Once retries
+    are exhausted the last error response is returned as is, so the SDKs
+    still raise their usual typed errors (RateLimitError...). While the
+    circuit is open requests fail fast with resilience.CircuitOpenError,
+    which the OpenAI SDK reports as an APIConnectionError.
+    """
+
+    def __init__(self, transport, provider="openai"):
+        self._transport = transport
+        self.provider = provider
+
+    def _send(self, request):
+        response = self._transport.handle_request(request)
+        if resilience.is_retryable_status(response.status_code):
+            response.read()
+            raise RetryableResponse(response)
+        return response
+
+    def handle_request(self, request):
+        try:
+            return resilience.call(self.provider, self._send, request)
+        except RetryableResponse as e:
+            return e.response
+
+    def close(self):
+        self._transport.close()
+
+
+def _new_http_client(provider=None):
+    """Pooled httpx client; requests go through `provider`'s resilience policy if given."""
+    http2 = HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logging.warning("LLM_HTTP2 is set but h2 isn't installed "
+                            "(pip install 'httpx[http2]'), using HTTP/1.1")
+            http2 = False
+    transport = httpx.HTTPTransport(http2=http2, limits=LIMITS)
+    if provider is not None:
+        transport = ResilientTransport(transport, provider)
+    return httpx.Client(transport=transport, timeout=TIMEOUT)
+
+
+def get_http_client():
+    """The shared, thread-safe httpx connection pool (with the "openai" policy)."""
+    return _get_or_create("http", lambda: _new_http_client("openai"))
+
+
+def get_litellm_http_client():
+    """Shared httpx connection pool for litellm, without a resilience policy."""
+    return _get_or_create("http-litellm", _new_http_client)
+
+
+def get_openai_client():
+    """Shared openai.OpenAI client (thread-safe) on the pooled connections."""
+    def create():
+        from openai import OpenAI
+        return OpenAI(api_key=_api_key(), http_client=get_http_client(),
+                      timeout=TIMEOUT, max_retries=0)
+    return _get_or_create("openai", create)
+
+
+def get_langchain_llm():
+    """Shared langchain_openai.OpenAI completion model on the pooled connections."""
+    def create():
+        from langchain_openai import OpenAI
+        return OpenAI(api_key=_api_key(), http_client=get_http_client(),
+                      timeout=TIMEOUT, max_retries=0)
+    return _get_or_create("langchain", create)
+
+
+def share_with_crewai(llm):
+    """
+    Routes a CrewAI LLM's traffic through the shared pool and returns it.
+
+    Native OpenAI LLMs (crewai.LLM with an OpenAI model) get the shared
+    openai.OpenAI client in place of the one they built for themselves;
+    litellm-backed LLMs get get_litellm_http_client() as litellm's sync
+    session, whatever their provider, since that session is global. Raises
+    RuntimeError if the client couldn't be swapped in, rather than silently
+    leaving the LLM on its own connections.
+    """
+    if getattr(llm, "is_litellm", False):
+        import litellm
+        litellm.client_session = get_litellm_http_client()
+        return llm
+
+    if getattr(llm, "provider", None) != "openai":
+        logging.warning(f"{type(llm).__name__} ({getattr(llm, 'provider', '?')}) "
+                        "keeps its own client; only OpenAI LLMs are pooled")
+        return llm
+
+    # OpenAICompletion keeps its SDK client in the _client private attribute
+    # and only rebuilds it while that is None
+    client = get_openai_client()
+    llm._client = client
+    get_client = getattr(llm, "_get_sync_client", None)
+    if get_client is None or get_client() is not client:
+        raise RuntimeError(f"Couldn't share the OpenAI client with {type(llm).__name__}; "
+                           "the installed CrewAI version builds its client differently")
+    return llm
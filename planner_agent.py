@@ -1,5 +1,4 @@
 import os
-from openai import OpenAI
 import requests
 import json
 from dotenv import load_dotenv
@@ -7,6 +6,10 @@ from dotenv import load_dotenv
 import nest_asyncio
 import asyncio
 
+import llm_clients
+import resilience
+import search_client
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -25,7 +28,8 @@ if not openai_api_key:
 if not serper_api_key:
     raise ValueError("SERPER_API_KEY environment variable is required")
 
-client = OpenAI(api_key=openai_api_key)
+# Shared, pooled client (see llm_clients.py)
+client = llm_clients.get_openai_client()
 
 # Serper search function (working version)
 def serper_search_tool(query):
@@ -34,19 +38,7 @@ def serper_search_tool(query):
     Much more generous free tier: 2,500 searches/month
     """
     try:
-        url = "https://google.serper.dev/search"
-        headers = {
-            'X-API-KEY': serper_api_key,
-            'Content-Type': 'application/json'
-        }
-        data = {
-            "q": query,
-            "num": 5
-        }
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        search_data = response.json()
+        search_data = search_client.adaptive_search(query)
         
         # Format search results
         results = []
@@ -59,7 +51,7 @@ def serper_search_tool(query):
         
         # Add organic results
         if search_data.get("organic"):
-            for result in search_data["organic"][:5]:
+            for result in search_data["organic"]:
                 title = result.get("title", "No title")
                 snippet = result.get("snippet", "No snippet")
                 link = result.get("link", "No link")
@@ -70,6 +62,8 @@ def serper_search_tool(query):
         else:
             return "No search results found."
             
+    except resilience.CircuitOpenError:
+        return "Search is temporarily unavailable. Answer with what you already know."
     except requests.exceptions.RequestException as e:
         return f"Error searching: {str(e)}"
     except Exception as e:
@@ -101,6 +95,90 @@ tools = [
     }
 ]
 
+SYSTEM_PROMPT = "You can search the internet. Use the serper_search function when needed to get current information."
+
+# Model used for the answer once search results are in the conversation
+FINAL_MODEL = "gpt-4"  # Fixed: use gpt-4 instead of gpt-5
+
+# Map-reduce mode: a short skeleton of the days first, then one completion per
+# day in parallel. Both prompts are appended after the shared conversation.
+SKELETON_PROMPT = """Using the request and the search results above, outline the itinerary.
+Return ONLY a JSON object, no other text, in this format:
+{"days": [{"day": 1, "date": "...", "location": "...", "focus": "one short sentence"}]}"""
+
+DAY_PROMPT = """Using the request and the search results above, write the detailed itinerary section for ONE day only.
+Start with a "Day N - date - location" heading, then a time-based schedule with practical details.
+Do not write an introduction or other days; they are written separately.
+Full trip outline (for context):
+{outline}
+Write this day: {day}"""
+
+
+def print_usage(label, usage):
+    """Prints token usage of one completion, including prompt tokens served from the provider cache."""
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) or 0
+    print(f"💰 {label}: {usage.total_tokens} (Input: {usage.prompt_tokens}, Cached input: {cached}, Output: {usage.completion_tokens})")
+
+
+def complete(messages, label):
+    """Final-model completion over the conversation; returns the message text."""
+    response = client.chat.completions.create(
+        model=FINAL_MODEL,
+        messages=messages
+    )
+    if hasattr(response, 'usage'):
+        print_usage(label, response.usage)
+    return response.choices[0].message.content
+
+
+def parse_skeleton(text):
+    """
+    Extracts the list of days from the skeleton completion, or None unless
+    it is valid JSON with a non-empty "days" list of objects.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return None
+    try:
+        days = json.loads(text[start:end + 1]).get("days")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    if not isinstance(days, list) or not days:
+        return None
+    if not all(isinstance(day, dict) for day in days):
+        return None
+    return days
+
+
+async def map_reduce_answer(messages):
+    """
+    Generates the answer as a skeleton of days plus one completion per day,
+    run in parallel over the same conversation (and search results), then
+    stitched back in day order. Falls back to a single completion if the
+    skeleton can't be parsed.
+    """
+    skeleton = complete(messages + [{"role": "user", "content": SKELETON_PROMPT}],
+                        "Skeleton tokens")
+    days = parse_skeleton(skeleton)
+    if not days:
+        print("⚠️ Could not parse the day skeleton, generating in one completion")
+        return complete(messages, "Final call tokens")
+
+    print(f"🗺️ Generating {len(days)} days in parallel")
+    outline = json.dumps(days, ensure_ascii=False)
+    day_sections = await asyncio.gather(*(
+        asyncio.to_thread(
+            complete,
+            messages + [{"role": "user", "content": DAY_PROMPT.format(
+                outline=outline, day=json.dumps(day, ensure_ascii=False))}],
+            f"Day {day.get('day', index + 1)} tokens"
+        )
+        for index, day in enumerate(days)
+    ))
+    return "\n\n".join(day_sections)
+
+
 # Agent Interaction
 # async def call_agent(query):
 #    """
@@ -120,15 +198,21 @@ tools = [
 #        if event.is_final_response():
 #            final_response = event.content.parts[0].text
 #            print("Agent Response: ", final_response)
-async def call_agent(query):
+async def call_agent(query, map_reduce=False):
     """
     Helper function to call the agent with a query using OpenAI function calling.
+    With map_reduce=True the answer after a search is generated day by day in
+    parallel (see map_reduce_answer), so long trips take about as long as one
+    day plus the skeleton.
     """
+    # Static system prompt and tools first, the request-specific query last,
+    # so repeated calls share a prefix the provider can cache
     messages = [
-        {"role": "system", "content": "You can search the internet. Use the serper_search function when needed to get current information."},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": query}
     ]
     
+    # The shared client applies the "openai" resilience policy to every request
     response = client.chat.completions.create(
         model="gpt-5", 
         messages=messages,
@@ -138,7 +222,7 @@ async def call_agent(query):
     
     # Debug: Print usage information
     if hasattr(response, 'usage'):
-        print(f"💰 Tokens used: {response.usage.total_tokens} (Input: {response.usage.prompt_tokens}, Output: {response.usage.completion_tokens})")
+        print_usage("Tokens used", response.usage)
         print(f"💵 Approximate cost: ${response.usage.total_tokens * 0.00003:.4f}")  # Rough estimate for GPT-4
     
     # Check if the model wants to call a function
@@ -167,19 +251,16 @@ async def call_agent(query):
                 })
         
         # Get the final response with the search results
-        final_response = client.chat.completions.create(
-            model="gpt-4",  # Fixed: use gpt-4 instead of gpt-5
-            messages=messages
-        )
-        
-        # Debug: Print usage for second call
-        if hasattr(final_response, 'usage'):
-            print(f"💰 Final call tokens: {final_response.usage.total_tokens}")
-        
-        print("Agent Response:", final_response.choices[0].message.content)
+        if map_reduce:
+            answer = await map_reduce_answer(messages)
+        else:
+            answer = complete(messages, "Final call tokens")
     else:
         # No function call needed
-        print("Agent Response:", response.choices[0].message.content)
+        answer = response.choices[0].message.content
+
+    print("Agent Response:", answer)
+    return answer
 
 nest_asyncio.apply()
 
@@ -193,10 +274,16 @@ nest_asyncio.apply()
 # asyncio.run(call_agent("Build an itinerary for a trip to Japan from 15 to 22 March 2025, focusing on culture and traditional experiences"))
 
 # Example 3: Interactive input
+# (guarded so call_agent can be imported, e.g. by scheduler.py)
 import sys
-if len(sys.argv) > 1:
-    destination_query = " ".join(sys.argv[1:])
-    asyncio.run(call_agent(destination_query))
-else:
-    # Default query
-    asyncio.run(call_agent("Build an itinerary from a travel to Morocco from 8 to 14 december 2025"))
\ No newline at end of file
+if __name__ == "__main__":
+    # --map-reduce generates the days in parallel completions
+    args = [arg for arg in sys.argv[1:] if arg != "--map-reduce"]
+    map_reduce = len(args) != len(sys.argv) - 1
+    if args:
+        destination_query = " ".join(args)
+        asyncio.run(call_agent(destination_query, map_reduce=map_reduce))
+    else:
+        # Default query
+        asyncio.run(call_agent("Build an itinerary from a travel to Morocco from 8 to 14 december 2025",
+                               map_reduce=map_reduce))
\ No newline at end of file
@@ -1,13 +1,17 @@
 import os
-import requests
 from crewai import Agent, Task, Crew
+from crewai.utilities.llm_utils import create_llm
 from crewai.tools import tool
-from langchain_openai import OpenAI
 from dotenv import load_dotenv
 # langchain-openai is a wrapper around OpenAI's API. This is the LangChain integration of the OpenAI API. It provides a higher-level abstraction specifically designed to work within the LangChain framework.
+# The shared langchain_openai.OpenAI instance comes from llm_clients.
 
 import logging
 
+import llm_clients
+import resilience
+import search_client
+
 logging.basicConfig(level=logging.INFO)
 
 # Load environment variables
@@ -17,6 +21,9 @@ load_dotenv()
 os.environ["OPENAI_API_KEY"] = os.getenv("OPEN_AI_KEY") or ""
 os.environ["SERPER_API_KEY"] = os.getenv("SERPER_API_KEY") or ""
 
+# CrewAI's default model (MODEL / OPENAI_MODEL_NAME), on the shared client
+llm = llm_clients.share_with_crewai(create_llm(None))
+
 
 # Tool to get live search results from Serper
 @tool("Serper Search Tool")
@@ -28,19 +35,7 @@ def serper_search(query: str) -> str:
     logging.info(f"Serper searching for: {query}")
 
     try:
-        url = "https://google.serper.dev/search"
-        headers = {
-            'X-API-KEY': os.environ.get("SERPER_API_KEY"),
-            'Content-Type': 'application/json'
-        }
-        data = {
-            "q": query,
-            "num": 5
-        }
-
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        search_data = response.json()
+        search_data = search_client.adaptive_search(query)
 
         # Format search results
         results = []
@@ -54,13 +49,15 @@ def serper_search(query: str) -> str:
 
         # Add organic results
         if search_data.get("organic"):
-            for result in search_data["organic"][:3]:
+            for result in search_data["organic"]:
                 title = result.get("title", "No title")
                 snippet = result.get("snippet", "No snippet")
                 results.append(f"{title}: {snippet}")
 
         return "\n".join(results) if results else "No search results found."
 
+    except resilience.CircuitOpenError:
+        return "Search is temporarily unavailable. Continue with what you already know."
     except Exception as e:
         return f"Error searching: {str(e)}"
 
@@ -91,12 +88,15 @@ def content_filter(content: str) -> str:
 def generate_itinerary(place: str, date_from: str, date_to: str,
                        live_info: str) -> str:
     """Generate a travel itinerary using OpenAI based on parameters."""
-    openai_client = OpenAI()
+    openai_client = llm_clients.get_langchain_llm()
+    # Static instructions first and request details last, so repeated calls
+    # share a prompt prefix the provider can cache
     prompt = (
-        f"Create a travel itinerary for {place} "
-        f"from {date_from} to {date_to}.\n"
-        f"Use the following live info: {live_info}\n"
-        "Make it structured and clear."
+        "Create a travel itinerary for the place and dates below, "
+        "using the live info provided. Make it structured and clear.\n"
+        f"Place: {place}\n"
+        f"Dates: {date_from} to {date_to}\n"
+        f"Live info: {live_info}"
     )
     response = openai_client.invoke(prompt)
     # return response.text
@@ -121,6 +121,7 @@ itinerary_agent = Agent(
     verbose=True,
     tools=[serper_search, generate_itinerary],
     allow_delegation=False,
+    llm=llm,
 )
 
 researcher_agent = Agent(
@@ -133,6 +134,7 @@ researcher_agent = Agent(
     verbose=True,
     tools=[serper_search, content_filter],
     allow_delegation=False,
+    llm=llm,
 )
 
 # Define the Task
@@ -198,14 +200,16 @@ def main():
     date_to = "2025-12-05"
 
     # Update the tasks with specific inputs
+    # Static instructions first, request parameters at the end (prompt caching)
     itinerary_task.description = (
-        f"Create a travel itinerary for {place} "  # → place parameter
-        f"from {date_from} to {date_to}. "  # → date_from, date_to parameters
-        f"Use the serper_search tool to get current information " # → live_info comes from this
-        f"about attractions and activities in {place} for December 2025. "
-        f"Focus on tourist attractions, museums, landmarks, and activities. "
-        f"DO NOT include events, festivals, or time-specific activities. "
-        f"Then use the generate_itinerary tool to create a structured itinerary."
+        "Create a travel itinerary for the place and dates given below. "
+        "Use the serper_search tool to get current information "  # → live_info comes from this
+        "about attractions and activities in the place for the travel dates. "
+        "Focus on tourist attractions, museums, landmarks, and activities. "
+        "DO NOT include events, festivals, or time-specific activities. "
+        "Then use the generate_itinerary tool to create a structured itinerary.\n"
+        f"Place: {place}\n"  # → place parameter
+        f"Dates: {date_from} to {date_to}"  # → date_from, date_to parameters
     )
 
     print(f"🗺️  Creating itinerary for {place} ({date_from} to {date_to})")
@@ -214,6 +218,8 @@ def main():
     
     # Execute the crew (both tasks will run in sequence)
     result = itinerary_crew.kickoff()
+    usage = result.token_usage
+    print(f"💰 Prompt tokens: {usage.prompt_tokens} (cached: {usage.cached_prompt_tokens})")
 
     print("\n" + "="*50)
     print("✅ COMPLETE TRAVEL PLAN")
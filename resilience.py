@@ -0,0 +1,260 @@
+"""
+Client-side resilience for the external providers the agents depend on
+(Serper, the Brave search fallback and OpenAI).
+
+Every outgoing call goes through call(provider, fn, ...), which applies:
+- a token-bucket rate limit sized to the provider's quota
+- retries with jittered exponential backoff, for retryable errors only
+  (timeouts, connection errors, 408, 429 and 5xx responses); throttled
+  responses (408/429) wait for their Retry-After when they send one
+- a circuit breaker that fails fast with CircuitOpenError while the
+  provider keeps failing, and lets a single trial call through after a
+  cool-down period. Only connection errors, timeouts and 5xx count as
+  failures: a throttled provider is up, it just wants us to slow down
+"""
+import os
+import time
+import random
+import threading
+import logging
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while its circuit is open."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens/second."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, amount=1):
+        """Takes `amount` tokens if available, without waiting."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return True
+            return False
+
+    def available(self):
+        """Tokens currently available, without taking any."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def set_rate(self, rate, capacity):
+        """Changes the refill rate and capacity, keeping at most `capacity` tokens."""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.capacity = capacity
+            self._tokens = min(self._tokens, capacity)
+
+    def acquire(self, amount=1):
+        """Blocks until `amount` tokens are available and takes them."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive failures.
+    Open -> half-open once `reset_timeout` seconds have passed; one trial
+    call is allowed and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if (self.state == "open" and
+                    time.monotonic() - self._opened_at >= self.reset_timeout):
+                self.state = "half-open"
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half-open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+    def is_open(self):
+        with self._lock:
+            return self.state == "open"
+
+
+class ProviderPolicy:
+    """Rate limit and circuit breaker shared by every call to one provider."""
+
+    def __init__(self, name, rate_per_sec, burst):
+        self.name = name
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self.bucket = TokenBucket(rate_per_sec, burst)
+        self.breaker = CircuitBreaker(
+            failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+        )
+
+
+MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "4"))
+BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))
+MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))
+# Longest Retry-After we honor; longer hints are capped to this
+MAX_RETRY_AFTER = float(os.getenv("RETRY_AFTER_MAX", "60"))
+
+# Sized to our quotas; override through the environment
+PROVIDERS = {
+    "serper": ProviderPolicy(
+        "serper",
+        rate_per_sec=float(os.getenv("SERPER_RATE_PER_SEC", "5")),
+        burst=int(os.getenv("SERPER_BURST", "10"))
+    ),
+    "brave": ProviderPolicy(
+        "brave",
+        rate_per_sec=float(os.getenv("BRAVE_RATE_PER_SEC", "1")),
+        burst=int(os.getenv("BRAVE_BURST", "1"))
+    ),
+    "openai": ProviderPolicy(
+        "openai",
+        rate_per_sec=float(os.getenv("OPENAI_RATE_PER_MIN", "500")) / 60,
+        burst=int(os.getenv("OPENAI_BURST", "20"))
+    ),
+}
+
+
+def share_rate_limits(processes):
+    """
+    Gives this process an equal 1/`processes` share of every provider's
+    configured rate limit, for pools where each process holds its own
+    PROVIDERS, so that together they stay within the quota. The burst
+    keeps at least one token so single calls can still go through.
+    """
+    for policy in PROVIDERS.values():
+        policy.bucket.set_rate(policy.rate_per_sec / processes,
+                               max(1, policy.burst / processes))
+
+
+# Exception class names (matched anywhere in the MRO) that are worth retrying.
+# Names rather than classes so this module doesn't import requests/openai/httpx.
+RETRYABLE_ERROR_NAMES = {
+    "ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout",
+    "TimeoutException", "NetworkError", "RemoteProtocolError",
+    "APIConnectionError", "APITimeoutError", "RateLimitError",
+    "InternalServerError", "ServiceUnavailableError",
+}
+
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_retryable_status(status):
+    """True for HTTP statuses worth retrying: 408, 429 and 5xx."""
+    return status in (408, 429) or status >= 500
+
+
+def is_throttled(error):
+    """True for 408/429 responses and rate-limit errors: the provider is up but busy."""
+    status = _status_code(error)
+    if status is not None:
+        return status in (408, 429)
+    return any(cls.__name__ == "RateLimitError" for cls in type(error).__mro__)
+
+
+def retry_after(error):
+    """Seconds from the error response's Retry-After header, or None."""
+    headers = getattr(error, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        value = float(headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+    return min(max(value, 0.0), MAX_RETRY_AFTER)
+
+
+def is_retryable(error):
+    """True for transient failures: timeouts, connection errors, 408, 429 and 5xx."""
+    status = _status_code(error)
+    if status is not None:
+        return is_retryable_status(status)
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES
+               for cls in type(error).__mro__)
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given 0-based retry attempt."""
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+
+
+def call(provider, fn, *args, **kwargs):
+    """
+    Calls fn(*args, **kwargs) under the provider's rate limit, retry and
+    circuit breaker policy. Non-retryable errors propagate immediately.
+    """
+    policy = PROVIDERS[provider]
+    if not policy.breaker.allow():
+        raise CircuitOpenError(f"{provider} circuit is open, failing fast")
+
+    for attempt in range(MAX_ATTEMPTS):
+        policy.bucket.acquire()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            throttled = is_throttled(e)
+            if not is_retryable(e) or throttled:
+                # The provider answered, it just rejected or throttled this request
+                policy.breaker.record_success()
+                if not throttled:
+                    raise
+            else:
+                policy.breaker.record_failure()
+            if attempt == MAX_ATTEMPTS - 1 or policy.breaker.is_open():
+                raise
+            delay = retry_after(e) if throttled else None
+            if delay is None:
+                delay = backoff_delay(attempt)
+            logging.warning(f"⏳ {provider} call failed ({e}), "
+                            f"retry {attempt + 1} in {delay:.1f}s")
+            time.sleep(delay)
+        else:
+            policy.breaker.record_success()
+            return result
@@ -0,0 +1,311 @@
+"""
+Fair-share scheduler for itinerary jobs shared by several tenants.
+
+Sits in front of travel_planner_multi_agent.create_travel_itinerary and
+planner_agent.call_agent:
+- priority classes: "interactive" jobs are always dispatched before
+  "batch" jobs that are ready at the same time, and batch jobs never take
+  the last INTERACTIVE_RESERVED_WORKERS workers, so an interactive job
+  doesn't wait behind long-running batch jobs
+- weighted fair queuing across tenants within a class (start-time fair
+  queuing: a tenant's jobs advance a virtual clock by cost / weight, and
+  the job with the smallest start tag runs next)
+- admission control: a job only starts once its tenant and the whole
+  scheduler have enough OpenAI token and search budget left (token
+  buckets refilled per minute); jobs that can never fit are rejected
+- metrics: queue depth per class and tenant, wait times per class
+
+Usage:
+    scheduler = ItineraryScheduler(tenant_weights={"web": 3, "catalog": 1})
+    future = scheduler.submit_itinerary("web", "Rome, Italy", "2025-12-01", "2025-12-03")
+    itinerary = future.result()
+    print(scheduler.metrics())
+"""
+import os
+import time
+import asyncio
+import threading
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import resilience
+from resilience import TokenBucket
+
+PRIORITIES = ("interactive", "batch")
+
+# Per-minute budgets; a job's estimate is charged when it starts
+TENANT_TOKEN_BUDGET = int(os.getenv("TENANT_TOKEN_BUDGET_PER_MIN", "200000"))
+TENANT_SEARCH_BUDGET = int(os.getenv("TENANT_SEARCH_BUDGET_PER_MIN", "60"))
+TOTAL_TOKEN_BUDGET = int(os.getenv("SCHEDULER_TOKEN_BUDGET_PER_MIN", "1000000"))
+TOTAL_SEARCH_BUDGET = int(os.getenv("SCHEDULER_SEARCH_BUDGET_PER_MIN", "300"))
+
+# Cost estimates per job type
+ITINERARY_TOKENS = int(os.getenv("ITINERARY_EST_TOKENS", "60000"))
+ITINERARY_SEARCHES = int(os.getenv("ITINERARY_EST_SEARCHES", "15"))
+AGENT_QUERY_TOKENS = int(os.getenv("AGENT_QUERY_EST_TOKENS", "8000"))
+AGENT_QUERY_SEARCHES = int(os.getenv("AGENT_QUERY_EST_SEARCHES", "3"))
+
+# Workers batch jobs can't take, kept free for interactive jobs (batch
+# always keeps at least one worker)
+INTERACTIVE_RESERVED_WORKERS = int(os.getenv("INTERACTIVE_RESERVED_WORKERS", "1"))
+
+# How often a worker re-checks budgets while every queued job is over budget
+ADMISSION_POLL_SECONDS = 0.5
+
+
+class QuotaExceededError(Exception):
+    """The job's estimated cost is larger than its tenant's budget can ever allow."""
+
+
+def _budget_bucket(per_minute):
+    return TokenBucket(per_minute / 60, per_minute)
+
+
+class _Job:
+    def __init__(self, tenant, priority, fn, args, kwargs, tokens, searches):
+        self.tenant = tenant
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.tokens = tokens
+        self.searches = searches
+        self.future = Future()
+        self.submitted_at = time.monotonic()
+        self.start_tag = 0.0
+
+
+class _Tenant:
+    def __init__(self, weight):
+        self.weight = weight
+        self.queues = {priority: deque() for priority in PRIORITIES}
+        self.last_finish_tag = {priority: 0.0 for priority in PRIORITIES}
+        self.tokens = _budget_bucket(TENANT_TOKEN_BUDGET)
+        self.searches = _budget_bucket(TENANT_SEARCH_BUDGET)
+
+
+class ItineraryScheduler:
+    def __init__(self, workers=2, tenant_weights=None):
+        self.tenant_weights = tenant_weights or {}
+        self._tenants = {}
+        self._virtual_time = {priority: 0.0 for priority in PRIORITIES}
+        self._tokens = _budget_bucket(TOTAL_TOKEN_BUDGET)
+        self._searches = _budget_bucket(TOTAL_SEARCH_BUDGET)
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._batch_slots = max(1, workers - INTERACTIVE_RESERVED_WORKERS)
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self._waits = {priority: deque(maxlen=1000) for priority in PRIORITIES}
+        self._itinerary_pool = None
+        self._itinerary_pool_size = workers
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"scheduler-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # -------------------------------------------------------------------------
+    # Submission
+    # -------------------------------------------------------------------------
+
+    def submit(self, tenant, fn, *args, priority="interactive",
+               estimated_tokens=0, estimated_searches=0, **kwargs):
+        """
+        Queues fn(*args, **kwargs) for `tenant` and returns a Future.
+        The estimates are charged against the tenant and global budgets when
+        the job starts.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"priority must be one of {PRIORITIES}")
+
+        job = _Job(tenant, priority, fn, args, kwargs,
+                   estimated_tokens, estimated_searches)
+        if (estimated_tokens > min(TENANT_TOKEN_BUDGET, TOTAL_TOKEN_BUDGET) or
+                estimated_searches > min(TENANT_SEARCH_BUDGET, TOTAL_SEARCH_BUDGET)):
+            with self._cond:
+                self._counters["rejected"] += 1
+            job.future.set_exception(QuotaExceededError(
+                f"Job needs {estimated_tokens} tokens / {estimated_searches} searches, "
+                f"more than the per-minute budget of tenant '{tenant}'"))
+            return job.future
+
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Scheduler is shut down")
+            state = self._tenant(tenant)
+            # Start-time fair queuing: cost is scaled down by the tenant weight
+            cost = max(estimated_tokens, 1) / state.weight
+            job.start_tag = max(self._virtual_time[priority],
+                                state.last_finish_tag[priority])
+            state.last_finish_tag[priority] = job.start_tag + cost
+            state.queues[priority].append(job)
+            self._counters["submitted"] += 1
+            self._cond.notify()
+        return job.future
+
+    def submit_itinerary(self, tenant, destination, start_date, end_date,
+                         preferences=None, priority="interactive"):
+        """
+        Schedules travel_planner_multi_agent.create_travel_itinerary. Jobs run
+        in worker processes (see batch_planner) because the crew holds module
+        level state that can't be shared between threads.
+        """
+        job = {"destination": destination, "start_date": start_date,
+               "end_date": end_date}
+        if preferences:
+            job["preferences"] = preferences
+        return self.submit(tenant, self._run_itinerary, job, priority=priority,
+                           estimated_tokens=ITINERARY_TOKENS,
+                           estimated_searches=ITINERARY_SEARCHES)
+
+    def submit_agent_query(self, tenant, query, priority="interactive"):
+        """Schedules planner_agent.call_agent; the Future resolves to the answer text."""
+        return self.submit(tenant, self._run_agent_query, query, priority=priority,
+                           estimated_tokens=AGENT_QUERY_TOKENS,
+                           estimated_searches=AGENT_QUERY_SEARCHES)
+
+    def _run_itinerary(self, job):
+        import batch_planner
+        with self._cond:
+            if self._itinerary_pool is None:
+                # The workers and this process (agent queries) each hold
+                # their own provider rate limits: split the quotas between them
+                processes = self._itinerary_pool_size + 1
+                resilience.share_rate_limits(processes)
+                self._itinerary_pool = ProcessPoolExecutor(
+                    max_workers=self._itinerary_pool_size,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=batch_planner.init_worker,
+                    initargs=(processes,))
+            pool = self._itinerary_pool
+        record = pool.submit(batch_planner.run_job, 0, job).result()
+        if not record["success"]:
+            raise RuntimeError(record["error"])
+        return record["output"]
+
+    def _run_agent_query(self, query):
+        import planner_agent
+        return asyncio.run(planner_agent.call_agent(query))
+
+    # -------------------------------------------------------------------------
+    # Dispatch
+    # -------------------------------------------------------------------------
+
+    def _tenant(self, tenant):
+        if tenant not in self._tenants:
+            self._tenants[tenant] = _Tenant(self.tenant_weights.get(tenant, 1))
+        return self._tenants[tenant]
+
+    def _admissible(self, job):
+        state = self._tenants[job.tenant]
+        return (state.tokens.available() >= job.tokens and
+                state.searches.available() >= job.searches and
+                self._tokens.available() >= job.tokens and
+                self._searches.available() >= job.searches)
+
+    def _next_job(self):
+        """
+        Picks the admissible queue head with the smallest start tag, trying
+        interactive before batch; batch jobs only start while they hold fewer
+        than self._batch_slots workers. Called with self._cond held.
+        """
+        for priority in PRIORITIES:
+            if priority == "batch" and self._running["batch"] >= self._batch_slots:
+                continue
+            candidates = [state.queues[priority][0]
+                          for state in self._tenants.values()
+                          if state.queues[priority]]
+            for job in sorted(candidates, key=lambda j: j.start_tag):
+                if not self._admissible(job):
+                    continue
+                state = self._tenants[job.tenant]
+                state.queues[priority].popleft()
+                for bucket, amount in ((state.tokens, job.tokens),
+                                       (state.searches, job.searches),
+                                       (self._tokens, job.tokens),
+                                       (self._searches, job.searches)):
+                    bucket.try_acquire(amount)
+                self._virtual_time[priority] = job.start_tag
+                return job
+        return None
+
+    def _has_queued(self):
+        return any(queue for state in self._tenants.values()
+                   for queue in state.queues.values())
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    job = self._next_job()
+                    if job is not None:
+                        break
+                    if self._shutdown and not self._has_queued():
+                        return
+                    # Either nothing is queued or every head is over budget
+                    self._cond.wait(timeout=ADMISSION_POLL_SECONDS)
+                self._running[job.priority] += 1
+                self._waits[job.priority].append(time.monotonic() - job.submitted_at)
+
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except Exception as e:
+                    logging.error(f"Scheduled job for '{job.tenant}' failed: {e}")
+                    job.future.set_exception(e)
+
+            with self._cond:
+                self._running[job.priority] -= 1
+                failed = job.future.cancelled() or job.future.exception() is not None
+                self._counters["failed" if failed else "completed"] += 1
+                # A batch slot may have freed up for a waiting worker
+                self._cond.notify()
+
+    # -------------------------------------------------------------------------
+    # Metrics and lifecycle
+    # -------------------------------------------------------------------------
+
+    def metrics(self):
+        """
+        Snapshot of queue depth (per class and per tenant), running jobs per class,
+        job counters and wait times in seconds (mean, p95, max) per class.
+        """
+        with self._cond:
+            depth = {priority: sum(len(state.queues[priority])
+                                   for state in self._tenants.values())
+                     for priority in PRIORITIES}
+            tenants = {name: {priority: len(state.queues[priority])
+                              for priority in PRIORITIES}
+                       for name, state in self._tenants.items()}
+            waits = {}
+            for priority, samples in self._waits.items():
+                ordered = sorted(samples)
+                waits[priority] = {
+                    "count": len(ordered),
+                    "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+                    "p95": ordered[int(0.95 * (len(ordered) - 1))] if ordered else 0.0,
+                    "max": ordered[-1] if ordered else 0.0,
+                }
+            return {
+                "queue_depth": depth,
+                "queue_depth_by_tenant": tenants,
+                "running": dict(self._running),
+                **self._counters,
+                "wait_seconds": waits,
+            }
+
+    def shutdown(self, wait=True):
+        """Stops accepting jobs; queued jobs still run before the workers exit."""
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+        if self._itinerary_pool is not None:
+            self._itinerary_pool.shutdown(wait=wait)
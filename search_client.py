@@ -0,0 +1,393 @@
+"""
+Shared search client for the travel planner agents.
+
+Searches go through a pluggable provider (see search_providers): Serper by
+default, optionally hedged with a second backend. Responses are normalized
+to one format and kept in an in-process cache keyed by the normalized query,
+so searches fetched ahead of time with prefetch() are served locally when an
+agent later asks for the same thing. Identical searches that are already in
+flight are coalesced: later callers wait on the first request instead of
+sending their own. adaptive_search() picks the result count per query,
+widening only when the first results aren't good enough. When ARTIFACT_DIR
+is set, raw responses are also persisted in the artifact store and reused
+across processes and runs.
+
+Hedging: when SEARCH_HEDGE_PROVIDER is set and the primary provider hasn't
+answered within its observed p95 latency, the same query is sent to the
+alternate provider and whichever answers first wins.
+"""
+import os
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import (Future, ThreadPoolExecutor, TimeoutError,
+                                as_completed)
+
+import artifact_store
+import resilience
+import search_providers
+
+# How long a cached search result stays valid (seconds)
+CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+
+PRIMARY_PROVIDER = search_providers.get_provider(
+    os.getenv("SEARCH_PROVIDER", "serper"))
+HEDGE_PROVIDER = (search_providers.get_provider(os.environ["SEARCH_HEDGE_PROVIDER"])
+                  if os.getenv("SEARCH_HEDGE_PROVIDER") else None)
+# Only Serper has image search, so it serves images whatever SEARCH_PROVIDER is
+IMAGE_PROVIDER = search_providers.get_provider("serper")
+
+# Raw responses persisted in the artifact store (ARTIFACT_DIR) are reused for
+# this long (seconds); 0 means they never expire
+ARTIFACT_MAX_AGE = int(os.getenv("ARTIFACT_SEARCH_MAX_AGE", "604800")) or None
+
+# Adaptive depth: result counts tried in order, until there are at least
+# MIN_UNIQUE_RESULTS unique results sharing MIN_RELEVANCE of the query terms
+SEARCH_DEPTHS = [int(n) for n in os.getenv("SEARCH_DEPTHS", "3,6,10").split(",")]
+MIN_UNIQUE_RESULTS = int(os.getenv("SEARCH_MIN_UNIQUE", "3"))
+MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "5"))
+MIN_RELEVANCE = 0.5
+STOPWORDS = {"the", "and", "for", "with", "from", "what", "are", "best",
+             "top", "how", "when", "where", "which", "near", "that", "this"}
+
+# Hedge delay used until enough latency samples were observed (seconds)
+HEDGE_DEFAULT_DELAY = float(os.getenv("SEARCH_HEDGE_DEFAULT_DELAY", "1.5"))
+HEDGE_MIN_SAMPLES = 20
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+# In-flight searches keyed like the cache; guarded by _cache_lock
+_inflight = {}
+_stats = {"requests": 0, "cache_hits": 0, "coalesced": 0,
+          "hedged": 0, "hedge_wins": 0,
+          "adaptive_queries": 0, "adaptive_widened": 0, "adaptive_chars": 0,
+          "artifact_hits": 0}
+
+# Background pool used for speculative prefetching
+_prefetch_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SEARCH_PREFETCH_WORKERS", "4")),
+    thread_name_prefix="search-prefetch"
+)
+
+
+class LatencyTracker:
+    """Rolling window of successful request latencies for one provider."""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def p95(self):
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return HEDGE_DEFAULT_DELAY
+            ordered = sorted(self._samples)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+_latency = {name: LatencyTracker() for name in search_providers.PROVIDERS}
+
+
+def normalize_query(query):
+    """Lowercases and collapses whitespace so equivalent queries share a key."""
+    return " ".join(query.lower().split())
+
+
+def _get_cached_locked(key):
+    """Cache lookup; the caller holds _cache_lock."""
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    stored_at, search_data = entry
+    if time.monotonic() - stored_at > CACHE_TTL:
+        del _cache[key]
+        return None
+    return search_data
+
+
+def _store(key, search_data):
+    with _cache_lock:
+        _cache[key] = (time.monotonic(), search_data)
+
+
+def _load_artifact(key):
+    """
+    Raw response persisted by an earlier process, if an artifact store is
+    configured. A store that can't be read counts as a miss.
+    """
+    try:
+        store = artifact_store.get_store()
+        if store is None:
+            return None
+        search_data = store.get(artifact_store.artifact_key(*key), max_age=ARTIFACT_MAX_AGE)
+    except Exception as e:
+        logging.warning(f"Could not read search artifact: {e}")
+        return None
+    if search_data is not None:
+        with _cache_lock:
+            _stats["artifact_hits"] += 1
+    return search_data
+
+
+def _save_artifact(key, search_data):
+    try:
+        store = artifact_store.get_store()
+        if store is None:
+            return
+        store.put(artifact_store.artifact_key(*key), key[0], search_data)
+    except Exception as e:
+        logging.warning(f"Could not persist search artifact: {e}")
+
+
+def _timed_search(provider, query, num, sent=None):
+    """
+    Searches under the provider's resilience policy. Only the provider
+    request itself is timed, not rate-limit waits or retry backoff, so the
+    latency window reflects the provider. `sent` is set when the first
+    request goes out.
+    """
+    def timed():
+        if sent is not None:
+            sent.set()
+        started = time.monotonic()
+        search_data = provider.search(query, num)
+        _latency[provider.name].record(time.monotonic() - started)
+        return search_data
+
+    return resilience.call(provider.name, timed)
+
+
+def _in_thread(fn, *args):
+    """
+    Runs fn(*args) on its own daemon thread and returns a Future. Hedged
+    requests don't share a bounded pool, so a hedge never queues behind
+    primaries that are blocked on their rate limit.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="search-hedge", daemon=True).start()
+    return future
+
+
+def _hedged_search(query, num):
+    """
+    Sends the query to the primary provider and, if it hasn't answered by its
+    p95 latency, to the hedge provider as well. First successful answer wins.
+    The hedge clock starts once the primary request is actually sent: a
+    local rate-limit queue doesn't make the provider slow.
+    """
+    if HEDGE_PROVIDER is None:
+        return _timed_search(PRIMARY_PROVIDER, query, num)
+
+    sent = threading.Event()
+    primary = _in_thread(_timed_search, PRIMARY_PROVIDER, query, num, sent)
+    # Also wakes up when the primary fails before sending (e.g. open circuit)
+    primary.add_done_callback(lambda _: sent.set())
+    sent.wait()
+    try:
+        return primary.result(timeout=_latency[PRIMARY_PROVIDER.name].p95())
+    except TimeoutError:
+        logging.info(f"🏁 Hedging slow search with {HEDGE_PROVIDER.name}: {query}")
+    except Exception as e:
+        # A failed primary is not slow, but the alternate can still answer
+        logging.info(f"🏁 {PRIMARY_PROVIDER.name} failed ({e}), "
+                     f"trying {HEDGE_PROVIDER.name}: {query}")
+
+    hedge = _in_thread(_timed_search, HEDGE_PROVIDER, query, num)
+    with _cache_lock:
+        _stats["hedged"] += 1
+
+    for future in as_completed([primary, hedge]):
+        if future.exception() is None:
+            if future is hedge:
+                with _cache_lock:
+                    _stats["hedge_wins"] += 1
+            return future.result()
+    # Both failed: report the primary provider's error
+    return primary.result()
+
+
+def _image_search(query, num):
+    return resilience.call(IMAGE_PROVIDER.name, IMAGE_PROVIDER.image_search,
+                           query, num)
+
+
+def search(query, num=5):
+    """
+    Returns normalized search results for the query, served from the cache
+    when the same search was already made (or prefetched).
+    Raises requests exceptions (after retries) or resilience.CircuitOpenError
+    on failure; callers decide how to report them.
+    """
+    return _cached_request("search", _hedged_search, query, num)
+
+
+def image_search(query, num=5):
+    """
+    Returns the raw Serper image search JSON ("images" list with imageUrl,
+    title, source...), whichever provider serves web searches. Cached and
+    coalesced like search().
+    """
+    return _cached_request("images", _image_search, query, num)
+
+
+def _cached_request(kind, fetch, query, num):
+    key = (kind, normalize_query(query), num)
+
+    # The cache and in-flight checks share one lock hold: the leader stores
+    # its result before leaving _inflight, so a caller can't slip in between
+    # and send a duplicate request
+    with _cache_lock:
+        search_data = _get_cached_locked(key)
+        if search_data is not None:
+            _stats["cache_hits"] += 1
+        else:
+            pending = _inflight.get(key)
+            if pending is None:
+                pending = Future()
+                _inflight[key] = pending
+                leader = True
+                _stats["requests"] += 1
+            else:
+                leader = False
+                _stats["coalesced"] += 1
+
+    if search_data is not None:
+        logging.info(f"⚡ Search cache hit: {query}")
+        return search_data
+
+    if not leader:
+        logging.info(f"🔗 Joining in-flight search: {query}")
+        return pending.result()
+
+    try:
+        search_data = _load_artifact(key)
+        if search_data is None:
+            search_data = fetch(query, num)
+            _save_artifact(key, search_data)
+        _store(key, search_data)
+        pending.set_result(search_data)
+        return search_data
+    except Exception as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _cache_lock:
+            del _inflight[key]
+
+
+def _relevance(query_terms, result):
+    """Fraction of the query's terms found in the result's title and snippet."""
+    if not query_terms:
+        return 1.0
+    text = normalize_query(f"{result.get('title', '')} {result.get('snippet', '')}")
+    return sum(term in text for term in query_terms) / len(query_terms)
+
+
+def _unique_results(query, search_data):
+    """
+    Organic results without duplicates (same link or same snippet start),
+    split into relevant and low-relevance ones.
+    """
+    query_terms = {term for term in normalize_query(query).split()
+                   if len(term) > 2 and term not in STOPWORDS}
+    seen = set()
+    relevant, other = [], []
+    for result in search_data.get("organic", []):
+        fingerprint = normalize_query(result.get("snippet", ""))[:80]
+        link = result.get("link")
+        if fingerprint in seen or (link and link in seen):
+            continue
+        seen.update({fingerprint, link} - {None})
+        if _relevance(query_terms, result) >= MIN_RELEVANCE:
+            relevant.append(result)
+        else:
+            other.append(result)
+    return relevant, other
+
+
+def adaptive_search(query):
+    """
+    Searches with a small result count first and widens (SEARCH_DEPTHS) only
+    while the answer box is missing and there aren't enough unique, relevant
+    results. Returns the search data of the depth used, with `organic`
+    reduced to at most SEARCH_MAX_RESULTS unique results and a
+    `searchDepth` entry reporting the depth and payload size used.
+    """
+    for num in SEARCH_DEPTHS:
+        search_data = search(query, num)
+        relevant, other = _unique_results(query, search_data)
+        answer = (search_data.get("answerBox") or {}).get("answer")
+        enough = len(relevant) >= MIN_UNIQUE_RESULTS or bool(answer and relevant)
+        # A short result list means the provider has nothing more to give
+        exhausted = len(search_data.get("organic", [])) < num
+        if enough or exhausted:
+            break
+
+    # Low-relevance results only pad a thin result list
+    if len(relevant) >= MIN_UNIQUE_RESULTS:
+        organic = relevant[:MAX_RESULTS]
+    else:
+        organic = (relevant + other)[:MIN_UNIQUE_RESULTS]
+    size = sum(len(r.get("title", "")) + len(r.get("snippet", "")) for r in organic)
+    if answer:
+        size += len(answer)
+
+    with _cache_lock:
+        _stats["adaptive_queries"] += 1
+        _stats["adaptive_widened"] += num != SEARCH_DEPTHS[0]
+        _stats["adaptive_chars"] += size
+    logging.info(f"📏 Search depth for '{query}': num={num}, "
+                 f"{len(organic)} results kept ({len(relevant)} relevant), {size} chars")
+
+    return {**search_data, "organic": organic,
+            "searchDepth": {"num": num, "results": len(organic), "chars": size}}
+
+
+def _prefetch_one(query):
+    try:
+        adaptive_search(query)
+    except Exception as e:
+        logging.warning(f"Prefetch failed for '{query}': {e}")
+
+
+def prefetch(queries):
+    """
+    Starts background adaptive searches for the given queries and returns
+    immediately. Results land in the cache; failures are only logged.
+    Returns the list of futures in case the caller wants to wait on them.
+    """
+    futures = []
+    for query in queries:
+        logging.info(f"🛰️ Prefetching: {query}")
+        futures.append(_prefetch_pool.submit(_prefetch_one, query))
+    return futures
+
+
+def get_stats():
+    """
+    Counters since startup: searches sent, cache hits, searches coalesced
+    onto an identical in-flight request, searches hedged to the alternate
+    provider and how many of those the alternate won, adaptive searches,
+    how many of them had to widen and the result characters they returned,
+    and searches served from the on-disk artifact store.
+    """
+    with _cache_lock:
+        return dict(_stats)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,103 @@
+"""
+Pluggable web search providers.
+
+Every provider returns results normalized to the Serper response shape the
+agents' formatters already read:
+
+    {"answerBox": {"answer": ..., "link": ...},   # optional
+     "organic": [{"title": ..., "snippet": ..., "link": ...}, ...]}
+
+Serper is the primary implementation; Brave Search is available as a second
+backend for web search (see search_client for how the two are hedged).
+Image search is Serper only.
+"""
+import os
+import re
+
+import requests
+
+# Per-request HTTP timeout (seconds); timeouts are retried by resilience.call
+REQUEST_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+
+
+class SearchProvider:
+    """Interface for a web search backend. `name` is also its resilience policy."""
+
+    name = ""
+
+    def search(self, query, num):
+        """Returns normalized results for the query (see module docstring)."""
+        raise NotImplementedError
+
+    def image_search(self, query, num):
+        """
+        Returns {"images": [{"title": ..., "imageUrl": ...}, ...]}. Only
+        Serper implements it; search_client always routes images there.
+        """
+        raise NotImplementedError(f"{self.name} has no image search")
+
+
+class SerperProvider(SearchProvider):
+    name = "serper"
+    search_url = "https://google.serper.dev/search"
+    images_url = "https://google.serper.dev/images"
+
+    def _post(self, url, query, num):
+        headers = {
+            'X-API-KEY': os.environ.get("SERPER_API_KEY"),
+            'Content-Type': 'application/json'
+        }
+        data = {"q": query, "num": num}
+
+        response = requests.post(url, headers=headers, json=data,
+                                 timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, query, num):
+        # Serper's format is the normalized one; keep the raw payload as is
+        return self._post(self.search_url, query, num)
+
+    def image_search(self, query, num):
+        return self._post(self.images_url, query, num)
+
+
+class BraveProvider(SearchProvider):
+    name = "brave"
+    search_url = "https://api.search.brave.com/res/v1/web/search"
+
+    def search(self, query, num):
+        headers = {
+            'X-Subscription-Token': os.environ.get("BRAVE_API_KEY"),
+            'Accept': 'application/json'
+        }
+        params = {"q": query, "count": num}
+
+        response = requests.get(self.search_url, headers=headers, params=params,
+                                timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        search_data = response.json()
+
+        organic = []
+        for result in search_data.get("web", {}).get("results", []):
+            organic.append({
+                "title": result.get("title", "No title"),
+                # Brave highlights matches with <strong> tags
+                "snippet": re.sub(r"<[^>]+>", "", result.get("description", "")),
+                "link": result.get("url", "")
+            })
+        return {"organic": organic}
+
+
+PROVIDERS = {
+    "serper": SerperProvider,
+    "brave": BraveProvider,
+}
+
+
+def get_provider(name):
+    try:
+        return PROVIDERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown search provider '{name}', "
+                         f"expected one of: {', '.join(PROVIDERS)}")
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def completion(content="ok", prompt_tokens=5, cached_tokens=0):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-5-nano",
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 1,
+                  "total_tokens": prompt_tokens + 1,
+                  "prompt_tokens_details": {"cached_tokens": cached_tokens}},
+    }
+
+
+class FakeOpenAI(BaseHTTPRequestHandler):
+    """
+    Stand-in for the OpenAI API: answers every POST with the next queued
+    (status, body) pair, or a plain "ok" completion when the queue is empty.
+    """
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    responses = deque()
+    requests = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        FakeOpenAI.requests.append(json.loads(body or b"{}"))
+        status, payload = (FakeOpenAI.responses.popleft() if FakeOpenAI.responses
+                           else (200, completion()))
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def fake_openai():
+    """
+    Starts the fake API and points every client at it. Session scoped:
+    llm_clients builds its shared clients once per process.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenAI)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ["OPEN_AI_KEY"] = "test"
+    os.environ["SERPER_API_KEY"] = "test"
+    os.environ["CREWAI_DISABLE_TELEMETRY"] = "true"
+    os.environ["OTEL_SDK_DISABLED"] = "true"
+    yield FakeOpenAI
+    server.shutdown()
+
+
+@pytest.fixture
+def api(fake_openai):
+    """The fake API with its queue and request log cleared."""
+    fake_openai.responses.clear()
+    fake_openai.requests.clear()
+    return fake_openai
+
+
+@pytest.fixture
+def planner(api):
+    """travel_planner_multi_agent, imported against the fake API."""
+    import travel_planner_multi_agent
+    return travel_planner_multi_agent
@@ -0,0 +1,18 @@
+import artifact_store
+from artifact_store import ArtifactStore
+
+
+def test_rebuild_index_keeps_creation_times(tmp_path, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    monkeypatch.setattr(artifact_store.time, "time", lambda: 1000.0)
+    store.put("old", "search", {"organic": []})
+    monkeypatch.undo()
+    store.put("fresh", "search", {"organic": [{"title": "Rome"}]})
+
+    store.rebuild_index()
+
+    assert store.get("old", max_age=3600) is None
+    assert store.get("old") == {"organic": []}
+    assert store.get("fresh", max_age=3600) == {"organic": [{"title": "Rome"}]}
+    store.close()
+
@@ -0,0 +1,24 @@
+import pytest
+
+
+@pytest.fixture
+def planner_agent(fake_openai):
+    import planner_agent
+    return planner_agent
+
+
+@pytest.mark.parametrize("text", [
+    "no json here",
+    '{"days": []}',
+    '{"days": "Day 1: Rome"}',
+    '{"days": {"day": 1}}',
+    '{"days": [1, 2]}',
+    '{"days": [{"day": 1}, "Day 2"]}',
+])
+def test_parse_skeleton_rejects_anything_but_a_list_of_days(planner_agent, text):
+    assert planner_agent.parse_skeleton(text) is None
+
+
+def test_parse_skeleton_returns_the_days(planner_agent):
+    text = 'Outline:\n{"days": [{"day": 1, "title": "Rome"}, {"day": 2}]}'
+    assert planner_agent.parse_skeleton(text) == [{"day": 1, "title": "Rome"}, {"day": 2}]
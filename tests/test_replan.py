@@ -0,0 +1,74 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+def itinerary(*locations, dates=None):
+    days = [{"day": i + 1, "location": location,
+             "activities": [{"name": f"{location} sight"}]}
+            for i, location in enumerate(locations)]
+    if dates:
+        for day, day_date in zip(days, dates):
+            day["date"] = day_date
+    return json.dumps({"success": True, "itinerary": {"days": days}})
+
+
+@pytest.fixture
+def crew_runs(planner, monkeypatch):
+    """
+    Replaces the crew run: each call plans one "New <date>" day per date
+    in its range, and is recorded as (start_date, end_date).
+    """
+    runs = []
+
+    def create_travel_itinerary(destination, start_date, end_date, **kwargs):
+        runs.append((start_date, end_date))
+        dates = [d.isoformat() for d in planner._date_range(start_date, end_date)]
+        return SimpleNamespace(raw=itinerary(*(f"New {d}" for d in dates)))
+
+    monkeypatch.setattr(planner, "create_travel_itinerary", create_travel_itinerary)
+    return runs
+
+
+def days_by_date(result):
+    return {day["date"]: day["location"]
+            for day in json.loads(result)["itinerary"]["days"]}
+
+
+def test_removed_day_then_extension_keeps_dates(planner, crew_runs):
+    first = itinerary("Colosseum", "Vatican", "Trastevere")
+    removed = planner.replan_travel_itinerary(
+        first, "Rome", "2025-12-01", "2025-12-03",
+        delta={"removed_days": [2]})
+    assert days_by_date(removed) == {"2025-12-01": "Colosseum",
+                                     "2025-12-03": "Trastevere"}
+
+    extended = planner.replan_travel_itinerary(
+        removed, "Rome", "2025-12-01", "2025-12-03",
+        delta={"end_date": "2025-12-04"})
+    assert days_by_date(extended) == {"2025-12-01": "Colosseum",
+                                      "2025-12-03": "Trastevere",
+                                      "2025-12-04": "New 2025-12-04"}
+    assert crew_runs == [("2025-12-04", "2025-12-04")]
+
+
+def test_each_contiguous_block_is_planned_separately(planner, crew_runs):
+    first = itinerary("Colosseum", "Vatican", dates=["2025-12-02", "2025-12-03"])
+    result = planner.replan_travel_itinerary(
+        first, "Rome", "2025-12-02", "2025-12-03",
+        delta={"start_date": "2025-12-01", "end_date": "2025-12-05"})
+
+    assert crew_runs == [("2025-12-01", "2025-12-01"), ("2025-12-04", "2025-12-05")]
+    assert list(days_by_date(result).values()) == [
+        "New 2025-12-01", "Colosseum", "Vatican", "New 2025-12-04", "New 2025-12-05"]
+
+
+def test_day_count_mismatch_fails(planner, monkeypatch):
+    monkeypatch.setattr(planner, "create_travel_itinerary",
+                        lambda *args, **kwargs: SimpleNamespace(raw=itinerary("Only one")))
+
+    with pytest.raises(ValueError):
+        planner.replan_travel_itinerary(
+            itinerary("Colosseum"), "Rome", "2025-12-01", "2025-12-01",
+            delta={"end_date": "2025-12-03"})
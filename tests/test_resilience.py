@@ -0,0 +1,74 @@
+import pytest
+
+import resilience
+
+
+@pytest.fixture
+def restore_rate_limits():
+    yield
+    resilience.share_rate_limits(1)
+
+
+def test_share_rate_limits_splits_the_configured_quota(restore_rate_limits):
+    openai = resilience.PROVIDERS["openai"]
+
+    resilience.share_rate_limits(4)
+    resilience.share_rate_limits(4)
+
+    assert openai.bucket.rate == pytest.approx(openai.rate_per_sec / 4)
+    assert openai.bucket.capacity == openai.burst / 4
+    assert openai.bucket.available() <= openai.burst / 4
+    assert resilience.PROVIDERS["brave"].bucket.capacity == 1
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.status_code = status
+        self.headers = headers or {}
+
+
+@pytest.fixture
+def serper(monkeypatch):
+    """The "serper" policy with a closed circuit and sleeps recorded instead of taken."""
+    policy = resilience.PROVIDERS["serper"]
+    policy.breaker.record_success()
+    delays = []
+    monkeypatch.setattr(resilience.time, "sleep", delays.append)
+    yield policy, delays
+    policy.breaker.record_success()
+
+
+def failing(*errors):
+    """A call that raises the given errors in turn, then returns "ok"."""
+    errors = list(errors)
+
+    def fn():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+    return fn
+
+
+def test_throttling_is_retried_without_opening_the_circuit(serper):
+    policy, delays = serper
+
+    for _ in range(3):
+        with pytest.raises(HTTPError):
+            resilience.call("serper", failing(*[HTTPError(429)] * resilience.MAX_ATTEMPTS))
+    assert policy.breaker.state == "closed"
+
+    assert resilience.call("serper", failing(HTTPError(429, {"Retry-After": "2"}))) == "ok"
+    assert 2.0 in delays
+
+
+def test_server_errors_open_the_circuit(serper):
+    policy, _ = serper
+
+    for _ in range(2):
+        with pytest.raises(Exception):
+            resilience.call("serper", failing(*[HTTPError(503)] * resilience.MAX_ATTEMPTS))
+
+    assert policy.breaker.is_open()
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.call("serper", failing())
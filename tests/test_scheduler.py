@@ -0,0 +1,31 @@
+import threading
+
+from scheduler import ItineraryScheduler
+
+
+def test_batch_jobs_leave_a_worker_for_interactive_jobs():
+    scheduler = ItineraryScheduler(workers=2)
+    release = threading.Event()
+    batch_started = threading.Event()
+    started = []
+
+    def batch_job(name):
+        started.append(name)
+        batch_started.set()
+        release.wait(timeout=10)
+        return name
+
+    try:
+        batch = [scheduler.submit("catalog", batch_job, name, priority="batch")
+                 for name in ("first", "second")]
+        assert batch_started.wait(timeout=5)
+        interactive = scheduler.submit("web", lambda: "answer")
+
+        assert interactive.result(timeout=5) == "answer"
+        assert started == ["first"]
+        assert scheduler.metrics()["running"]["batch"] == 1
+    finally:
+        release.set()
+        scheduler.shutdown()
+
+    assert [future.result() for future in batch] == ["first", "second"]
@@ -0,0 +1,63 @@
+import pytest
+
+import resilience
+import search_client
+
+
+class FakeProvider:
+    def __init__(self, name, answer):
+        self.name = name
+        self.answer = answer
+
+    def search(self, query, num):
+        return self.answer
+
+
+@pytest.fixture
+def queued_serper(monkeypatch):
+    """
+    Serper answers instantly but its local rate limit is drained, so the
+    request first waits ~0.3 s in the token bucket. Brave is the hedge.
+    """
+    monkeypatch.setattr(search_client, "PRIMARY_PROVIDER",
+                        FakeProvider("serper", {"organic": ["serper"]}))
+    monkeypatch.setattr(search_client, "HEDGE_PROVIDER",
+                        FakeProvider("brave", {"organic": ["brave"]}))
+    monkeypatch.setattr(search_client, "HEDGE_DEFAULT_DELAY", 0.1)
+    monkeypatch.setitem(search_client._latency, "serper", search_client.LatencyTracker())
+
+    bucket = resilience.PROVIDERS["serper"].bucket
+    bucket.set_rate(3, 1)
+    bucket.try_acquire(bucket.available())
+    yield
+    resilience.share_rate_limits(1)
+
+
+def test_rate_limit_wait_is_neither_latency_nor_a_reason_to_hedge(queued_serper):
+    hedged = search_client.get_stats()["hedged"]
+
+    assert search_client._hedged_search("rome", 3) == {"organic": ["serper"]}
+    assert search_client.get_stats()["hedged"] == hedged
+    assert max(search_client._latency["serper"]._samples) < 0.1
+
+
+def test_image_search_goes_to_serper_whatever_the_web_provider(monkeypatch):
+    monkeypatch.setattr(search_client, "PRIMARY_PROVIDER",
+                        search_client.search_providers.get_provider("brave"))
+    calls = []
+    monkeypatch.setattr(search_client.IMAGE_PROVIDER, "image_search",
+                        lambda query, num: calls.append(query) or {"images": []})
+
+    assert search_client.image_search("colosseum rome") == {"images": []}
+    assert calls == ["colosseum rome"]
+
+
+def test_unreadable_artifact_is_a_miss(monkeypatch, caplog):
+    class BrokenStore:
+        def get(self, key, max_age=None):
+            raise OSError("corrupt record")
+
+    monkeypatch.setattr(search_client.artifact_store, "get_store", BrokenStore)
+
+    assert search_client._load_artifact(("search", "rome", 3)) is None
+    assert "Could not read search artifact: corrupt record" in caplog.text
@@ -0,0 +1,87 @@
+"""
+Import-and-call smoke tests: the real CrewAI LLM and the shared OpenAI
+client, talking to the fake API from conftest.py.
+"""
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+import resilience
+from conftest import completion
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(resilience, "BASE_DELAY", 0.01)
+    resilience.PROVIDERS["openai"].breaker.record_success()
+
+
+def test_multi_agent_llm_call(planner):
+    import llm_clients
+
+    assert planner.llm.call("ping") == "ok"
+    assert planner.llm.supports_function_calling()
+    assert planner.llm.get_context_window_size() > 0
+    assert planner.llm._get_sync_client() is llm_clients.get_openai_client()
+
+
+def test_multi_agent_kickoff(planner, api):
+    from crewai import Agent, Task, Crew
+
+    agent = Agent(role="Tester", goal="Answer", backstory="Smoke test",
+                  llm=planner.llm)
+    task = Task(description="Say ok", expected_output="ok", agent=agent)
+    result = Crew(agents=[agent], tasks=[task]).kickoff()
+
+    assert result.raw == "ok"
+    assert len(api.requests) == 1
+
+
+def test_cached_tokens_are_reported_per_call(planner, api, caplog):
+    from crewai.events import crewai_event_bus
+
+    api.responses.append((200, completion(prompt_tokens=100, cached_tokens=64)))
+    before = planner.llm.get_token_usage_summary()
+
+    with caplog.at_level(logging.INFO):
+        planner.llm.call("ping")
+        crewai_event_bus.flush()
+
+    usage = planner.llm.get_token_usage_summary()
+    assert usage.cached_prompt_tokens - before.cached_prompt_tokens == 64
+    assert "100 prompt tokens (64 cached)" in caplog.text
+
+
+def test_transient_errors_are_retried(planner, api, fast_retries):
+    api.responses.extend([(429, {"error": {"message": "slow down"}}),
+                          (503, {"error": {"message": "unavailable"}})])
+
+    assert planner.llm.call("ping") == "ok"
+    assert len(api.requests) == 3
+
+
+def test_client_errors_are_not_retried(planner, api, fast_retries):
+    from openai import BadRequestError
+
+    api.responses.append((400, {"error": {"message": "bad request"}}))
+
+    with pytest.raises(BadRequestError):
+        planner.llm._get_sync_client().chat.completions.create(
+            model="gpt-5-nano", messages=[{"role": "user", "content": "ping"}])
+    assert len(api.requests) == 1
+
+
+def test_litellm_llms_share_a_pool_without_the_openai_policy(fake_openai, monkeypatch):
+    import litellm
+    import llm_clients
+
+    monkeypatch.setattr(litellm, "client_session", None)
+    # share_with_crewai only looks at is_litellm on litellm-backed LLMs
+    llm = SimpleNamespace(is_litellm=True, provider="groq")
+
+    assert llm_clients.share_with_crewai(llm) is llm
+    assert litellm.client_session is llm_clients.get_litellm_http_client()
+    assert litellm.client_session is not llm_clients.get_http_client()
+    assert not isinstance(litellm.client_session._transport,
+                          llm_clients.ResilientTransport)
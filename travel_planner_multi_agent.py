@@ -1,11 +1,22 @@
 import os
-import requests
+import sys
 import json
+from datetime import date, timedelta
 from crewai import Agent, Task, Crew, LLM, Process
+from crewai.tasks.task_output import TaskOutput
+from crewai.crews.crew_output import CrewOutput
 from crewai.tools import tool
+from crewai.events import crewai_event_bus, LLMCallCompletedEvent
 from dotenv import load_dotenv
 import logging
 
+import artifact_store
+import checkpoints
+import image_resolver
+import llm_clients
+import resilience
+import search_client
+
 logging.basicConfig(level=logging.INFO)
 load_dotenv()
 
@@ -36,6 +47,20 @@ llm = LLM(
 # )
 
 
+# Share the process-wide connection pool, whose transport applies the
+# "openai" resilience policy (rate limit, retries, circuit breaker)
+llm = llm_clients.share_with_crewai(llm)
+
+
+@crewai_event_bus.on(LLMCallCompletedEvent)
+def log_llm_usage(source, event):
+    """Logs prompt tokens per LLM call, with how many were served from the provider cache."""
+    if source is not llm or not event.usage:
+        return
+    logging.info(f"💰 LLM call: {event.usage.get('prompt_tokens', 0)} prompt tokens "
+                 f"({event.usage.get('cached_prompt_tokens', 0)} cached)")
+
+
 # =============================================================================
 # STEP 1: SPECIALIZED TOOLS
 # =============================================================================
@@ -45,29 +70,22 @@ def serper_search(query: str) -> str:
     """Performs a web search using Serper API."""
     logging.info(f"🔍 Searching: {query}")
     try:
-        url = "https://google.serper.dev/search"
-        headers = {
-            'X-API-KEY': os.environ.get("SERPER_API_KEY"),
-            'Content-Type': 'application/json'
-        }
-        data = {"q": query, "num": 5}
-
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        search_data = response.json()
+        search_data = search_client.adaptive_search(query)
 
         results = []
         if (search_data.get("answerBox") and search_data["answerBox"].get("answer")):
             results.append(f"Answer: {search_data['answerBox']['answer']}")
 
         if search_data.get("organic"):
-            for result in search_data["organic"][:3]:
+            for result in search_data["organic"]:
                 title = result.get("title", "No title")
                 snippet = result.get("snippet", "No snippet")
                 results.append(f"{title}: {snippet}")
 
         return "\n".join(results) if results else "No results found."
 
+    except resilience.CircuitOpenError:
+        return "Search is temporarily unavailable. Continue with what you already know."
     except Exception as e:
         return f"Search error: {str(e)}"
 
@@ -117,39 +135,6 @@ def attraction_details(attraction_name: str, location: str,
     return attraction_details_prompt
 
 
-@tool("Enhanced Image Finder Tool")
-def image_finder(attraction_name: str, location: str) -> str:
-    """Provides guidance for finding high-quality images of attractions."""
-    logging.info(f"📸 Finding images for: {attraction_name}")
-
-    image_search_prompt = f"""
-    Find high-quality, representative images for "{attraction_name}" in {location}.
-
-    Search for:
-    - Professional photos showing the attraction's key features
-    - Images that capture the architectural or natural beauty
-    - Photos taken during different times of day (golden hour preferred)
-    - Images that show the scale and context of the attraction
-    - Current photos (not historical unless specifically relevant)
-
-    Focus on finding images that would help travelers:
-    - Recognize the attraction when they arrive
-    - Understand what makes it visually impressive
-    - See the best angles or viewpoints for their own photos
-
-    Return image data in this format:
-    {{
-        "location": "{attraction_name}, {location}",
-        "image_url": "[actual URL from search results]",
-        "image_description": "Brief description of what the image shows"
-    }}
-
-    Use web search to find actual image URLs from reliable sources.
-    """
-
-    return image_search_prompt
-
-
 @tool("JSON Formatter Tool")
 def format_travel_json(itinerary_text: str, destination: str, 
                       start_date: str, end_date: str) -> str:
@@ -162,7 +147,6 @@ def format_travel_json(itinerary_text: str, destination: str,
         days = []
         current_day = None
         current_activities = []
-        current_images = []
         
         for line in lines:
             line = line.strip()
@@ -174,7 +158,6 @@ def format_travel_json(itinerary_text: str, destination: str,
                 # Save previous day if exists
                 if current_day is not None:
                     current_day['activities'] = current_activities
-                    current_day['images_day'] = current_images
                     days.append(current_day)
                 
                 # Parse day header
@@ -191,7 +174,6 @@ def format_travel_json(itinerary_text: str, destination: str,
                     "images_day": []
                 }
                 current_activities = []
-                current_images = []
             
             # Parse activities (numbered items like "1. Colosseum")
             elif line and line[0].isdigit() and '.' in line:
@@ -214,21 +196,10 @@ def format_travel_json(itinerary_text: str, destination: str,
                 desc_info = line.split('Description:')[1].strip()
                 if current_activities:
                     current_activities[-1]['description'] = desc_info
-            
-            # Parse images
-            elif '- Images:' in line or line.strip().startswith('-') and 'image' in line.lower():
-                # Extract image descriptions for later conversion to URLs
-                img_desc = line.replace('-', '').strip()
-                if img_desc and current_day:
-                    current_images.append({
-                        "url": "https://upload.wikimedia.org/wikipedia/commons/placeholder.jpg",
-                        "description": img_desc
-                    })
 
         # Add the last day
         if current_day is not None:
             current_day['activities'] = current_activities
-            current_day['images_day'] = current_images
             days.append(current_day)
         
         # Create final structured JSON
@@ -299,17 +270,6 @@ researcher_agent = Agent(
     allow_delegation=False
 )
 
-# 📸 IMAGE COLLECTOR AGENT - Finds relevant images
-image_collector_agent = Agent(
-    role="Visual Content Curator",
-    goal="Find high-quality, relevant images for each day's main attractions and activities", 
-    backstory="You are a visual content specialist who finds the best representative images for travel destinations. You focus on finding images that showcase the key attractions and experiences for each day.",
-    verbose=True,
-    tools=[serper_search, image_finder],
-    llm=llm,  # Use configured LLM
-    allow_delegation=False
-)
-
 
 # =============================================================================
 # STEP 3: SEQUENTIAL TASKS WITH DEPENDENCIES
@@ -327,26 +287,37 @@ image_collector_agent = Agent(
 # This format will be parsed into the final JSON structure.
 # """
 
+# Task descriptions are fixed templates: every static instruction and output
+# format spec comes first and the per-request parameters are only filled into
+# the trailing TRAVEL REQUEST block (via kickoff inputs). Together with the
+# static agent roles and tool schemas this keeps an identical prompt prefix
+# across requests, so provider-side prompt caching applies.
+
 # 📋 TASK 1: Planning & Structure (Planner Agent)
 planning_task = Task(
     description="""
-    Create a structured travel itinerary with the following requirements:
-
-    INPUT: You will receive destination, dates, and traveler preferences
+    Create a structured travel itinerary for the TRAVEL REQUEST given at the end.
 
     YOUR TASKS:
     1. Search for top attractions and activities in the destination
     2. Optimize the order and grouping by proximity and logistics
     3. Create a day-by-day structure with time slots
     4. Balance activity intensity and travel time
+    5. Consider the traveler's preferences
 
-    OUTPUT FORMAT: Return a structured list for each day containing:
-    - Day number
-    - Main location/area focus
-    - Time-based activity schedule
-    - Logical flow and transitions
+    OUTPUT FORMAT: Structure each day as:
+    Day X: [Location Name]
+    - HH:MM-HH:MM Activity name (specific details)
+    - HH:MM-HH:MM Next activity (specific details)
+    [Brief day description explaining the cultural/historical significance]
 
     Use your tools to research attractions and optimize routing.
+
+    TRAVEL REQUEST:
+    Destination: {destination}
+    Dates: {start_date} to {end_date}
+    Traveler preferences: {preferences}
+    {constraints}
     """,
     expected_output="Structured itinerary with optimized daily schedules, activity timing, and logical flow between attractions",
     agent=planner_agent
@@ -364,8 +335,8 @@ research_task = Task(
     2. Find opening hours, prices, and practical details for the planned dates
     3. Add transport information between locations
     4. Include relevant tips and descriptions
-    5. Verify current information and availability for the specific dates
-    6. When using attraction_details tool, extract the actual date from the itinerary
+    5. Verify current information and availability for the travel dates
+    6. Start with the cached searches listed in the TRAVEL REQUEST, using those exact queries
 
     OUTPUT FORMAT: Enhanced itinerary with:
     - Detailed descriptions for each activity
@@ -375,38 +346,19 @@ research_task = Task(
     - Date-specific information (events, hours, etc.)
 
     Build upon the previous task's structure and use the exact dates provided.
+
+    TRAVEL REQUEST:
+    Destination: {destination}
+    Dates: {start_date} to {end_date}
+    Cached searches:
+{cached_queries}
     """,
     expected_output="Comprehensive itinerary with detailed attraction information, practical details, opening hours, prices, and rich descriptions for the specific travel dates",
     agent=researcher_agent,
     context=[planning_task]  # Gets input from planning_task
 )
 
-# 📸 TASK 3: Image Collection (Image Collector Agent)
-image_collection_task = Task(
-    description="""
-    Take the detailed itinerary and add visual elements for each day.
-
-    YOUR TASKS:
-    1. Find relevant images for each day's main attractions
-    2. Select 1-3 key images per day representing main highlights  
-    3. Ensure images match the specific attractions mentioned
-    4. Provide image descriptions and context
-
-    OUTPUT FORMAT: Complete itinerary with image sections:
-    - Image URLs for key attractions
-    - Descriptive captions
-    - Location context for each image
-
-    Focus on the most important attractions from each day.
-    """,
-    expected_output="Final comprehensive itinerary with relevant images, URLs, and descriptions for each day's key attractions",
-    agent=image_collector_agent,
-    # TODO maybe is better to don't wait for the research task
-    # context=[planning_task, research_task]  # Gets input from both previous tasks
-    context=[planning_task] 
-)
-
-# 📋 TASK 4: Final JSON Assembly
+# 📋 TASK 3: Final JSON Assembly
 json_assembly_task = Task(
     description="""
     Take all the information from previous tasks and format it into the exact JSON structure required.
@@ -414,18 +366,22 @@ json_assembly_task = Task(
     YOUR TASKS:
     1. Parse the planning task output for day structure
     2. Extract detailed information from research task  
-    3. Incorporate images from image collection task
-    4. Use format_travel_json tool with the complete itinerary text
-    5. Return properly structured JSON with success, message, and itinerary.days
+    3. Use format_travel_json tool with the complete itinerary text
+    4. Return properly structured JSON with success, message, and itinerary.days
+    Leave images_day empty, images are resolved automatically afterwards.
 
     IMPORTANT: Call format_travel_json with the full itinerary text from previous tasks.
     The tool will parse and structure everything correctly.
 
     OUTPUT: Complete JSON matching the required format exactly.
+
+    TRAVEL REQUEST:
+    Destination: {destination}
+    Dates: {start_date} to {end_date}
     """,
     expected_output="Complete JSON-formatted itinerary with success, message, and itinerary.days containing all travel information in proper structure",
     agent=planner_agent,  # Reuse planner agent for final assembly
-    context=[planning_task, research_task, image_collection_task],
+    context=[planning_task, research_task],
     tools=[format_travel_json]  # Add the JSON formatter tool
 )
 
@@ -434,15 +390,8 @@ json_assembly_task = Task(
 # =============================================================================
 
 # travel_crew = Crew(
-#     agents=[planner_agent, researcher_agent, image_collector_agent],
-#     tasks=[planning_task, research_task, image_collection_task],
-#     verbose=True,
-#     sequential=True
-# )
-
-# travel_crew = Crew(
-#     agents=[planner_agent, researcher_agent, image_collector_agent],
-#     tasks=[planning_task, research_task, image_collection_task, json_assembly_task],
+#     agents=[planner_agent, researcher_agent],
+#     tasks=[planning_task, research_task, json_assembly_task],
 #     verbose=True,
 #     # sequential=True
 #     process=Process.hierarchical  # Allows parallel execution where possible
@@ -457,70 +406,164 @@ travel_crew = Crew(
 
 )
 
+# Crew tasks in execution order; the names are used for checkpoint files
+CREW_TASKS = [
+    ("planning", planning_task),
+    ("research", research_task),
+    ("json_assembly", json_assembly_task),
+]
+
 # =============================================================================
 # STEP 5: MAIN EXECUTION FUNCTION
 # =============================================================================
 
 
-def create_travel_itinerary(destination: str, start_date: str, end_date: str,
-                           preferences: str = "adventure and cultural activities"):
+def prefetch_queries(destination: str, start_date: str, end_date: str):
     """
-    Main function to create a comprehensive travel itinerary.
+    Searches whose wording only depends on the request parameters.
+    The researcher is told to reuse these exact queries so they hit the cache.
     """
+    return [
+        f"top attractions in {destination}",
+        f"opening hours of famous landmarks in {destination}",
+        f"seasonal events in {destination} from {start_date} to {end_date}",
+    ]
+
+
+def save_artifact(key: str, kind: str, value):
+    """Persists a run artifact when an artifact store (ARTIFACT_DIR) is configured."""
+    store = artifact_store.get_store()
+    if store is None:
+        return
+    try:
+        store.put(key, kind, value)
+    except Exception as e:
+        logging.warning(f"Could not persist {kind} artifact: {e}")
 
-    # Update task descriptions with specific input parameters
-    planning_task.description = f"""
-    Create a structured travel itinerary for {destination} from {start_date} to {end_date}.
-
-    Traveler preferences: {preferences}
 
-    YOUR TASKS:
-    1. Search for top attractions and activities in {destination}
-    2. Optimize the order and grouping by proximity and logistics
-    3. Create a day-by-day structure with time slots
-    4. Balance activity intensity and travel time
-    5. Consider the traveler's preferences: {preferences}
+def save_task_output(run_id: str, name: str, raw_output: str):
+    checkpoints.save_task_output(run_id, name, raw_output)
+    save_artifact(f"{run_id}/{name}", "task", raw_output)
 
-    OUTPUT FORMAT: Structure each day as:
-    Day X: [Location Name]
-    - HH:MM-HH:MM Activity name (specific details)
-    - HH:MM-HH:MM Next activity (specific details)
-    [Brief day description explaining the cultural/historical significance]
 
-    Use your tools to research attractions and optimize routing for {destination}.
+def prepare_crew_tasks(run_id: str, resume: bool):
     """
-
-    research_task.description = f"""
-    Take the structured itinerary for {destination} and enrich it with detailed information.
-
-    YOUR TASKS:
-    1. Research detailed information for each attraction/activity in {destination}
-    2. Find opening hours, prices, and practical details
-    3. Add transport information between locations
-    4. Include relevant tips and descriptions
-    5. Verify current information and availability for {start_date} to {end_date}
-
-    Build upon the previous task's structure.
+    Hooks checkpointing onto every task and, when resuming, restores the
+    outputs of tasks that already completed for this run so they are skipped.
+    Returns the tasks that still have to run, in order.
+    """
+    pending = []
+    for name, task in CREW_TASKS:
+        saved = None
+        # Once one task has to run again, every later task depends on it
+        if resume and not pending:
+            saved = checkpoints.load_task_output(run_id, name)
+
+        if saved is not None:
+            logging.info(f"⏭️ Skipping task '{name}', restored from checkpoint")
+            task.output = TaskOutput(description=task.description, raw=saved,
+                                     agent=task.agent.role)
+            continue
+
+        task.callback = (lambda output, name=name:
+                         save_task_output(run_id, name, output.raw))
+        pending.append(task)
+    return pending
+
+
+def attach_images(result, destination: str):
+    """
+    Image stage: fills images_day of the final itinerary JSON with real image
+    URLs from the search client, without any LLM turn. Leaves the result
+    untouched if its output isn't parseable JSON.
     """
+    try:
+        itinerary = parse_itinerary_json(result.raw)
+    except json.JSONDecodeError:
+        logging.warning("Final output is not JSON, skipping image resolution")
+        return result
 
-    image_collection_task.description = f"""
-    Take the detailed itinerary for {destination} and add visual elements for each day.
+    image_resolver.resolve_itinerary_images(itinerary, destination)
+    result.raw = json.dumps(itinerary, indent=2)
+    return result
 
-    YOUR TASKS:
-    1. Find relevant images for each day's main attractions in {destination}
-    2. Select 1-3 key images per day representing main highlights
-    3. Ensure images match the specific attractions mentioned
-    4. Provide image descriptions and context
 
-    Focus on the most important attractions from each day in {destination}.
+def create_travel_itinerary(destination: str, start_date: str, end_date: str,
+                           preferences: str = "adventure and cultural activities",
+                           resume: bool = False, constraints: str = ""):
+    """
+    Main function to create a comprehensive travel itinerary.
+    Each task's output is checkpointed under checkpoints.RUNS_DIR; with
+    resume=True tasks that already completed for the same request are skipped.
+    `constraints` is appended to the planning instructions (used by re-planning).
     """
+    request = {
+        "destination": destination,
+        "start_date": start_date,
+        "end_date": end_date,
+        "preferences": preferences,
+        "constraints": constraints,
+        "model": llm.model,
+    }
+    run_id = checkpoints.request_hash(**request)
+    checkpoints.save_request(run_id, request)
+
+    # Search counters cover the whole process (every job of a batch worker),
+    # so this run's searches are the difference
+    stats_before = search_client.get_stats()
+
+    # Start the predictable searches now so they overlap with the planner's
+    # LLM calls; the researcher's identical queries are then served from cache
+    cached_queries = prefetch_queries(destination, start_date, end_date)
+    search_client.prefetch(cached_queries)
+
+    # Fills the TRAVEL REQUEST block at the end of each task description
+    inputs = {
+        "destination": destination,
+        "start_date": start_date,
+        "end_date": end_date,
+        "preferences": preferences,
+        "constraints": constraints,
+        "cached_queries": "\n".join(f"    - {query}" for query in cached_queries),
+    }
+
     print(f"🚀 Starting multi-agent travel planning for {destination}")
     print(f"📅 Dates: {start_date} to {end_date}")
     print(f"🎯 Preferences: {preferences}")
+    print(f"🗂️ Run: {run_id} ({checkpoints.run_dir(run_id)})")
     print("\n" + "="*60)
 
-    # Execute the crew - all tasks run sequentially
-    result = travel_crew.kickoff()
+    # The LLM's usage counters cover its whole lifetime (every run of a batch
+    # worker), so this run's usage is the difference
+    usage_before = llm.get_token_usage_summary()
+
+    pending = prepare_crew_tasks(run_id, resume)
+    if not pending:
+        print("♻️ All tasks already completed for this run, using checkpoints")
+        result = CrewOutput(raw=json_assembly_task.output.raw,
+                            tasks_output=[task.output for _, task in CREW_TASKS])
+    else:
+        if len(pending) == len(CREW_TASKS):
+            crew = travel_crew
+        else:
+            crew = Crew(agents=travel_crew.agents, tasks=pending, verbose=True)
+
+        # Execute the crew - all pending tasks run sequentially
+        result = crew.kickoff(inputs=inputs)
+
+    attach_images(result, destination)
+    save_artifact(run_id, "itinerary", result.raw)
+
+    stats = {name: count - stats_before[name]
+             for name, count in search_client.get_stats().items()}
+    print(f"🔍 Searches: {stats['requests']} sent, {stats['cache_hits']} cache hits, "
+          f"{stats['coalesced']} coalesced, {stats['adaptive_widened']} of "
+          f"{stats['adaptive_queries']} widened")
+    usage = llm.get_token_usage_summary()
+    prompt_tokens = usage.prompt_tokens - usage_before.prompt_tokens
+    if prompt_tokens:
+        cached_tokens = usage.cached_prompt_tokens - usage_before.cached_prompt_tokens
+        print(f"💰 Prompt tokens: {prompt_tokens} (cached: {cached_tokens})")
 
     print("\n" + "="*60)
     print("✅ COMPLETE TRAVEL ITINERARY")
@@ -529,6 +572,152 @@ def create_travel_itinerary(destination: str, start_date: str, end_date: str,
     return result
 
 
+def parse_itinerary_json(itinerary):
+    """
+    Returns the itinerary as a dict. Accepts a dict, a JSON string or LLM
+    output with the JSON object embedded in surrounding text.
+    """
+    if isinstance(itinerary, dict):
+        return itinerary
+    text = str(itinerary)
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        start, end = text.find("{"), text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+        return json.loads(text[start:end + 1])
+
+
+def _date_range(start_date: str, end_date: str):
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def _contiguous_blocks(dates):
+    """Splits sorted dates into runs of consecutive days."""
+    blocks = []
+    for day_date in dates:
+        if blocks and day_date - blocks[-1][-1] == timedelta(days=1):
+            blocks[-1].append(day_date)
+        else:
+            blocks.append([day_date])
+    return blocks
+
+
+def replan_travel_itinerary(previous_itinerary, destination: str, start_date: str,
+                            end_date: str,
+                            preferences: str = "adventure and cultural activities",
+                            delta: dict = None):
+    """
+    Re-plans only the days affected by `delta` and reuses every other day of
+    `previous_itinerary` (the JSON produced for destination/start_date/
+    end_date/preferences). Dates are ISO formatted (YYYY-MM-DD).
+
+    Days are matched to dates through their "date" field, which every
+    re-planned itinerary carries; days without one (a first itinerary) are
+    dated from start_date and their day number. In a dated itinerary, dates
+    of the previous range with no day (removed by an earlier re-plan) stay
+    removed.
+
+    delta keys, all optional:
+    - start_date / end_date: new trip dates; days outside them are dropped
+      and new dates are planned
+    - preferences: new traveler preferences; every day that isn't pinned
+      is re-planned
+    - pinned_days: day numbers of the previous itinerary to keep unchanged
+    - removed_days: day numbers of the previous itinerary to drop
+
+    Each run of consecutive affected dates is planned by its own crew run.
+    Raises ValueError if a run doesn't return one day per date.
+
+    Returns the merged itinerary JSON string, days in date order, numbered
+    from 1 and each with its ISO "date".
+    """
+    delta = delta or {}
+    previous_days = parse_itinerary_json(previous_itinerary)["itinerary"]["days"]
+    new_start = delta.get("start_date", start_date)
+    new_end = delta.get("end_date", end_date)
+    new_preferences = delta.get("preferences", preferences)
+    pinned = set(delta.get("pinned_days", []))
+    removed = set(delta.get("removed_days", []))
+    preferences_changed = new_preferences != preferences
+
+    old_dates = _date_range(start_date, end_date)
+    previous_by_date = {}
+    removed_dates = set()
+    for day in previous_days:
+        if day.get("date"):
+            day_date = date.fromisoformat(day["date"])
+        elif 1 <= day["day"] <= len(old_dates):
+            day_date = old_dates[day["day"] - 1]
+        else:
+            continue
+        if day["day"] in removed:
+            removed_dates.add(day_date)
+        else:
+            previous_by_date[day_date] = day
+    # A dated (re-planned) itinerary's gaps are days removed earlier
+    if previous_days and all(day.get("date") for day in previous_days):
+        removed_dates.update(day_date for day_date in old_dates
+                             if day_date not in previous_by_date)
+
+    kept = {}
+    affected = []
+    for day_date in _date_range(new_start, new_end):
+        if day_date in removed_dates:
+            continue
+        previous_day = previous_by_date.get(day_date)
+        reusable = previous_day is not None and (
+            previous_day["day"] in pinned or not preferences_changed)
+        if reusable:
+            kept[day_date] = previous_day
+        else:
+            affected.append(day_date)
+
+    print(f"♻️ Re-planning {len(affected)} day(s), reusing {len(kept)} day(s)")
+
+    planned = {}
+    for block in _contiguous_blocks(affected):
+        # Days planned in earlier blocks count as already planned too
+        kept_summary = "\n".join(
+            f"    - {day_date.isoformat()}: {day['location']} "
+            f"({', '.join(a['name'] for a in day.get('activities', []))})"
+            for day_date, day in sorted({**kept, **planned}.items())
+        ) or "    - none"
+        constraints = f"""
+    RE-PLANNING: plan ONLY these dates, one day each, in this order:
+    {", ".join(day_date.isoformat() for day_date in block)}
+
+    These days are already planned and stay as they are; do not repeat their attractions:
+{kept_summary}
+    """
+        result = create_travel_itinerary(
+            destination=destination,
+            start_date=block[0].isoformat(),
+            end_date=block[-1].isoformat(),
+            preferences=new_preferences,
+            constraints=constraints
+        )
+        new_days = parse_itinerary_json(result.raw)["itinerary"]["days"]
+        if len(new_days) != len(block):
+            raise ValueError(f"Re-planning {block[0]} to {block[-1]} returned "
+                             f"{len(new_days)} day(s), expected {len(block)}")
+        planned.update(zip(block, new_days))
+
+    days = []
+    for day_date, day in sorted({**kept, **planned}.items()):
+        days.append({**day, "day": len(days) + 1, "date": day_date.isoformat()})
+
+    return json.dumps({
+        "success": True,
+        "message": "Itinerary re-planned successfully",
+        "itinerary": {
+            "days": days
+        }
+    }, indent=2)
+
+
 def main():
     # Example: Create itinerary for Rome (smaller example for testing)
     destination = "Rome, Italy"
@@ -541,12 +730,16 @@ def main():
     api_key_status = "Yes" if os.environ.get('OPENAI_API_KEY') else "No"
     print(f"🔑 API Key configured: {api_key_status}")
 
+    # Pass --resume to skip tasks that completed in a previous attempt
+    resume = "--resume" in sys.argv
+
     try:
         itinerary = create_travel_itinerary(
             destination=destination,
             start_date=start_date,
             end_date=end_date,
-            preferences=preferences
+            preferences=preferences,
+            resume=resume
         )
 
         print("\n" + "="*60)